@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+DEFAULT_CACHE_PATH = "./data/ats_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+def make_cache_key(resume_text, job_description, job_title, model_name, prompt_version):
+    """Content hash of everything that determines an ATS analysis result."""
+    digest = hashlib.sha256()
+    for part in (resume_text, job_description, job_title, model_name, str(prompt_version)):
+        digest.update(_normalize(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class AnalysisCache:
+    """SQLite-backed result cache with LRU eviction and a TTL."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ats_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ats_cache_accessed ON ats_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM ats_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM ats_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE ats_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ats_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM ats_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM ats_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM ats_cache WHERE key IN "
+                "(SELECT key FROM ats_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug("Evicted %d ATS cache entries", overflow)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ats_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM ats_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+            "max_entries": self.max_entries,
+        }
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """Process-wide cache instance, configurable via ATS_CACHE_* env vars."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache(
+                path=os.getenv("ATS_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.getenv("ATS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                ttl_seconds=int(os.getenv("ATS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            )
+    return _default_cache
@@ -0,0 +1,503 @@
+"""Headless HTTP API for the analysis pipeline.
+
+Analyze and score requests become jobs on a bounded queue served by a worker pool;
+clients poll the job URL for the result. Job records are written under API_JOB_DIR and
+resume vectors to the per-resume index store, so replicas sharing both directories can
+answer status and chat requests for any job behind a load balancer.
+
+Usage:
+    python api_server.py --port 8080 --workers 4
+"""
+import argparse
+import base64
+import binascii
+import json
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from ats_analyzer import SCORING_MODES, DEFAULT_SCORING_MODE
+from gemini_client import QueueFullError
+from metrics import export_prometheus, set_gauge, span
+from session_manager import get_session_manager
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", 8080))
+API_WORKERS = int(os.getenv("API_WORKERS", 4))
+API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", 32))
+# Queued plus running jobs one tenant may hold, so a single client can't fill the queue
+API_MAX_JOBS_PER_TENANT = int(os.getenv("API_MAX_JOBS_PER_TENANT", 4))
+API_MAX_BODY_MB = float(os.getenv("API_MAX_BODY_MB", 10))
+API_JOB_TTL_SECONDS = float(os.getenv("API_JOB_TTL_SECONDS", 3600))
+# Share this and VECTOR_STORE_DIR between replicas when scaling out; both hold only
+# per-job or content-addressed files written through unique temp names
+API_JOB_DIR = os.getenv("API_JOB_DIR", "./data/api_jobs")
+# "tenant:key,tenant:key"; when set, the tenant is taken from the bearer key instead of the header
+API_KEYS = os.getenv("API_KEYS", "")
+TENANT_HEADER = "X-Tenant-ID"
+DEFAULT_TENANT = "default"
+RETRY_AFTER_SECONDS = 5
+PRUNE_INTERVAL_SECONDS = 60
+
+TENANT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+JOB_PATH = re.compile(r"^/v1/jobs/([^/]+)$")
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def parse_api_keys(spec):
+    keys = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        tenant, _, key = entry.partition(":")
+        if not TENANT_PATTERN.match(tenant) or not key:
+            raise ValueError(f"Invalid API_KEYS entry for tenant {tenant!r}")
+        keys[key] = tenant
+    return keys
+
+class Job:
+    def __init__(self, tenant, kind, payload=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.tenant = tenant
+        self.kind = kind
+        self.payload = payload
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "tenant": self.tenant,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["tenant"], data["kind"], job_id=data["job_id"])
+        for field in ("status", "result", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, field, data.get(field))
+        return job
+
+class JobStore:
+    """Jobs in memory on the replica that runs them and on disk, one directory per tenant."""
+
+    def __init__(self, root=API_JOB_DIR, ttl_seconds=API_JOB_TTL_SECONDS):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _path(self, tenant, job_id):
+        return os.path.join(self.root, tenant, f"{job_id}.json")
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def discard(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    def save(self, job):
+        path = self._path(job.tenant, job.id)
+        # Serialized so a slower write of an older status can't land last
+        with self._write_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp_path, path)
+
+    def get(self, tenant, job_id):
+        """The tenant's job, or None; other tenants' jobs are indistinguishable from missing ones."""
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job if job.tenant == tenant else None
+        try:
+            with open(self._path(tenant, job_id), encoding="utf-8") as f:
+                return Job.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to read job {job_id}: {str(e)}")
+            return None
+
+    def prune(self):
+        """Forget finished jobs older than the TTL, in memory and on disk."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished and job.finished_at < cutoff:
+                    del self._jobs[job_id]
+        if not os.path.isdir(self.root):
+            return
+        for tenant in os.listdir(self.root):
+            tenant_dir = os.path.join(self.root, tenant)
+            if not os.path.isdir(tenant_dir):
+                continue
+            for name in os.listdir(tenant_dir):
+                path = os.path.join(tenant_dir, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    # Another replica may have pruned it first
+                    pass
+
+class JobQueue:
+    """Bounded FIFO of jobs served by a fixed worker pool, with a per-tenant in-flight cap."""
+
+    def __init__(self, handlers, store, workers=API_WORKERS, max_queue=API_MAX_QUEUE,
+                 max_per_tenant=API_MAX_JOBS_PER_TENANT):
+        self.handlers = handlers
+        self.store = store
+        self.max_per_tenant = max_per_tenant
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._running = 0
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+        self._workers = [threading.Thread(target=self._work, name=f"api-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+        # Housekeeping runs on its own timer so it keeps up under steady traffic
+        self._stop = threading.Event()
+        self._housekeeper = threading.Thread(target=self._housekeep, name="api-housekeeping", daemon=True)
+        self._housekeeper.start()
+
+    def _publish(self):
+        set_gauge("api_queue_depth", self._queue.qsize())
+        set_gauge("api_running_jobs", self._running)
+
+    def submit(self, tenant, kind, payload):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(tenant, kind, payload)
+        with self._lock:
+            if self._in_flight.get(tenant, 0) >= self.max_per_tenant:
+                self.counters["rejected"] += 1
+                raise QueueFullError(f"Tenant {tenant} already has {self.max_per_tenant} jobs in progress")
+            self.store.add(job)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.store.discard(job)
+                self.counters["rejected"] += 1
+                raise QueueFullError("Job queue is full, try again shortly")
+            self._in_flight[tenant] = self._in_flight.get(tenant, 0) + 1
+            self.counters["submitted"] += 1
+            self._publish()
+        self._save(job)
+        return job
+
+    def _save(self, job):
+        # Every status change is written so polling works against any replica
+        try:
+            self.store.save(job)
+        except OSError as e:
+            logger.error(f"Failed to save job {job.id}: {str(e)}")
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _housekeep(self):
+        while not self._stop.wait(PRUNE_INTERVAL_SECONDS):
+            try:
+                self.store.prune()
+                get_session_manager().sweep()
+            except Exception as e:
+                logger.error(f"API housekeeping failed: {str(e)}")
+
+    def _run(self, job):
+        with self._lock:
+            self._running += 1
+            self._publish()
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        try:
+            with span(f"api_{job.kind}", queue_wait_s=job.started_at - job.created_at):
+                job.result = self.handlers[job.kind](job)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.error(f"API job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            # The uploaded PDF isn't needed once the job has run
+            job.payload = None
+            job.finished_at = time.time()
+            self._save(job)
+            with self._lock:
+                self._running -= 1
+                self._in_flight[job.tenant] -= 1
+                if not self._in_flight[job.tenant]:
+                    del self._in_flight[job.tenant]
+                self.counters[job.status] += 1
+                self._publish()
+
+    def ready(self):
+        return not self._queue.full()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, queue_depth=self._queue.qsize(), queue_capacity=self._queue.maxsize,
+                        running=self._running, workers=len(self._workers), tenants=len(self._in_flight))
+
+    def shutdown(self):
+        """Let queued jobs finish, then stop the workers."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._stop.set()
+        self._housekeeper.join()
+
+def _session_id(tenant, analysis_id):
+    return f"{tenant}/{analysis_id}"
+
+def run_score_job(job):
+    """Parse, fetch the job description and score; no index is built."""
+    from pdf_parser import parse_pdf_resume
+    from web_scraper import get_job_description
+    from ats_analyzer import analyze_resume
+
+    payload = job.payload
+    resume_text, sections = parse_pdf_resume(payload["resume_pdf"])
+    if not resume_text:
+        raise ValueError("Failed to parse resume: no text found")
+    job_description = get_job_description(payload["job_title"], payload["job_description"])
+    ats_results = analyze_resume(resume_text, job_description, payload["job_title"], sections,
+                                 payload["scoring_mode"])
+    return {"ats_results": ats_results}
+
+def run_analyze_job(job):
+    """Full pipeline; the resulting chatbot is kept in the session manager under the job id."""
+    from pipeline import run_analysis_pipeline
+    from vector_store import get_vector_store
+
+    payload = job.payload
+    result = run_analysis_pipeline(payload["resume_pdf"], payload["job_title"], payload["job_description"],
+                                   scoring_mode=payload["scoring_mode"], tenant=job.tenant)
+    # Other replicas restore chat sessions from the store, so this resume's vectors must be on disk first
+    get_vector_store().wait_for_resume(result.resume_key)
+    get_session_manager().store_analysis(_session_id(job.tenant, job.id), payload["job_title"], result.resume_key,
+                                         result.ats_results, result.vectorstore, result.chatbot)
+    return {
+        "analysis_id": job.id,
+        "job_title": payload["job_title"],
+        "resume_key": result.resume_key,
+        "ats_results": result.ats_results,
+        "timings": result.timings,
+        "wall_time_s": result.wall_time,
+    }
+
+JOB_HANDLERS = {"analyze": run_analyze_job, "score": run_score_job}
+
+def answer_chat(store, tenant, analysis_id, query):
+    """Answer a question about a finished analysis, restoring its index on this replica if needed."""
+    job = store.get(tenant, analysis_id)
+    if job is None or job.kind != "analyze":
+        raise ApiError(404, "Analysis not found")
+    if job.status != "succeeded":
+        raise ApiError(409, f"Analysis is {job.status}")
+
+    manager = get_session_manager()
+    session_id = _session_id(tenant, analysis_id)
+    if manager.get(session_id).resume_key is None:
+        # Analyzed on another replica, or expired here; the index is rebuilt from the shared store
+        result = job.result
+        manager.store_analysis(session_id, result["job_title"], result["resume_key"], result["ats_results"],
+                               None, None)
+    chatbot = manager.get_chatbot(session_id)
+    answer = chatbot(query)
+    manager.add_chat(session_id, query, answer)
+    return {"analysis_id": analysis_id, "answer": answer, "timing": dict(chatbot.latencies[-1])}
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, jobs, store, api_keys=None):
+        super().__init__(address, ApiHandler)
+        self.jobs = jobs
+        self.store = store
+        self.api_keys = api_keys or {}
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CareerSyncAPI/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _tenant(self):
+        if self.server.api_keys:
+            auth = self.headers.get("Authorization", "")
+            tenant = self.server.api_keys.get(auth[7:] if auth.startswith("Bearer ") else "")
+            if tenant is None:
+                raise ApiError(401, "Missing or invalid API key")
+            return tenant
+        tenant = self.headers.get(TENANT_HEADER) or DEFAULT_TENANT
+        if not TENANT_PATTERN.match(tenant):
+            raise ApiError(400, f"Invalid {TENANT_HEADER} header")
+        return tenant
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # A negative length would make rfile.read() block until the client hangs up
+            raise ApiError(400, "Invalid Content-Length")
+        if length > API_MAX_BODY_MB * 1024 * 1024:
+            raise ApiError(413, f"Request body exceeds {API_MAX_BODY_MB:g} MB")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def _job_payload(self, body):
+        job_title = body.get("job_title")
+        if not isinstance(job_title, str) or not job_title.strip():
+            raise ApiError(400, "job_title is required")
+        job_description = body.get("job_description") or ""
+        if not isinstance(job_description, str):
+            raise ApiError(400, "job_description must be a string")
+        scoring_mode = body.get("scoring_mode") or DEFAULT_SCORING_MODE
+        if scoring_mode not in SCORING_MODES:
+            raise ApiError(400, f"scoring_mode must be one of {', '.join(SCORING_MODES)}")
+        try:
+            resume_pdf = base64.b64decode(body.get("resume_pdf_base64") or "", validate=True)
+        except (binascii.Error, TypeError):
+            raise ApiError(400, "resume_pdf_base64 must be base64-encoded PDF bytes")
+        if not resume_pdf:
+            raise ApiError(400, "resume_pdf_base64 is required")
+        return {"resume_pdf": resume_pdf, "job_title": job_title.strip(),
+                "job_description": job_description, "scoring_mode": scoring_mode}
+
+    def _handle(self, method):
+        path = urlparse(self.path).path.rstrip("/") or "/"
+        try:
+            if method == "GET" and path == "/healthz":
+                return self._send(200, {"status": "ok"})
+            if method == "GET" and path == "/readyz":
+                # Lets a load balancer steer new work away from a saturated replica
+                stats = self.server.jobs.stats()
+                return self._send(200 if self.server.jobs.ready() else 503, stats)
+            if method == "GET" and path == "/metrics":
+                return self._send(200, export_prometheus(), content_type="text/plain; version=0.0.4")
+
+            tenant = self._tenant()
+            if method == "POST" and path in ("/v1/analyze", "/v1/score"):
+                payload = self._job_payload(self._read_json())
+                job = self.server.jobs.submit(tenant, path.rsplit("/", 1)[1], payload)
+                status_url = f"/v1/jobs/{job.id}"
+                return self._send(202, {"job_id": job.id, "status": job.status, "status_url": status_url},
+                                  headers={"Location": status_url})
+            job_path = JOB_PATH.match(path)
+            if method == "GET" and job_path:
+                job = self.server.store.get(tenant, job_path.group(1))
+                if job is None:
+                    raise ApiError(404, "Job not found")
+                headers = {} if job.finished else {"Retry-After": "1"}
+                return self._send(200, job.to_dict(), headers=headers)
+            if method == "POST" and path == "/v1/chat":
+                body = self._read_json()
+                analysis_id, query = body.get("analysis_id"), body.get("query")
+                if not isinstance(analysis_id, str) or not isinstance(query, str) or not query.strip():
+                    raise ApiError(400, "analysis_id and query are required")
+                return self._send(200, answer_chat(self.server.store, tenant, analysis_id, query))
+            raise ApiError(404, "Not found")
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)})
+        except QueueFullError as e:
+            # Backpressure: the client should retry later, ideally against another replica
+            self._send(429, {"error": str(e)}, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+        except Exception as e:
+            logger.error(f"API error on {method} {path}: {str(e)}")
+            self._send(500, {"error": str(e)})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+def create_server(host=API_HOST, port=API_PORT, workers=API_WORKERS, max_queue=API_MAX_QUEUE):
+    store = JobStore()
+    jobs = JobQueue(JOB_HANDLERS, store, workers=workers, max_queue=max_queue)
+    return ApiServer((host, port), jobs, store, parse_api_keys(API_KEYS))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the resume analysis pipeline over HTTP.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=API_MAX_QUEUE)
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.workers, args.max_queue)
+    # Stop accepting on SIGTERM, then drain queued jobs before exiting
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    logger.info("API listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.jobs.shutdown()
+        from vector_store import get_vector_store
+        get_vector_store().flush()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
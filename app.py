@@ -1,39 +1,62 @@
+import os
+import uuid
 import streamlit as st
-from pdf_parser import parse_pdf_resume
-from web_scraper import get_job_description
-from ats_analyzer import analyze_resume_with_gemini
-from embedder import create_embeddings
-from chatbot import initialize_chatbot
+from ats_analyzer import SCORING_MODES, DEFAULT_SCORING_MODE
+from analysis_cache import get_analysis_cache
+from embedder import warm_up_in_background, get_embedding_stats
+from session_manager import get_session_manager
+from metrics import export_json, export_prometheus, reset as reset_metrics, snapshot as metrics_snapshot
 from util import setup_logging
-import os
 
 # Configure logging
-logger = setup_logging()
+logger = setup_logging(__name__)
 
 # Set page configuration
 st.set_page_config(page_title="CareerZync-ATS", layout="wide", initial_sidebar_state="expanded")
 
-# Initialize session state
+# Load and warm the embedding model once per process on a background thread,
+# so the first page render doesn't wait on torch
+warm_up_in_background()
+
+# Number of past exchanges rendered on the Chatbot page
+CHAT_WINDOW = 10
+# The Admin page shows every session's stats and can reset process-wide metrics, so it is
+# only offered to deployments that opt in; Prometheus scraping doesn't depend on it
+ADMIN_PAGE = os.getenv("ADMIN_PAGE", "0").lower() in ("1", "true", "yes")
+
+# Initialize session state; the vectorstore, chatbot and chat history live in the
+# process-wide session manager so idle sessions can be evicted under a memory budget
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if "page" not in st.session_state:
     st.session_state.page = "Home"
-if "chatbot" not in st.session_state:
-    st.session_state.chatbot = None
-if "ats_results" not in st.session_state:
-    st.session_state.ats_results = None
 if "user_assumed_ats_percentage" not in st.session_state:
     st.session_state.user_assumed_ats_percentage = 75.0
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+if "scoring_mode" not in st.session_state:
+    st.session_state.scoring_mode = DEFAULT_SCORING_MODE
+
+session_manager = get_session_manager()
+session_id = st.session_state.session_id
+session = session_manager.get(session_id)
 
 # Sidebar navigation
 with st.sidebar:
     st.markdown("<h2 style='text-align: center;'>CareerZync</h2>", unsafe_allow_html=True)
-    pages = ["Home", "ATS Analysis", "Chatbot"]
+    pages = ["Home", "ATS Analysis", "Chatbot"] + (["Admin"] if ADMIN_PAGE else [])
     st.session_state.page = st.selectbox("Navigate", pages, key="nav_selectbox")
     st.markdown("---")
     st.markdown("**About**")
     st.write("CareerZync-ATS optimizes your resume for ATS systems and provides personalized advice.")
     st.markdown("**Version**: 1.0.0")
+    with st.expander("Performance"):
+        embedding_stats = get_embedding_stats()
+        st.write(f"Model loads: {embedding_stats['model_loads']} ({embedding_stats['load_time_s']:.2f}s)")
+        st.write(f"Encode calls: {embedding_stats['encode_calls']} (avg {embedding_stats['avg_encode_s'] * 1000:.1f} ms)")
+        cache_stats = get_analysis_cache().stats()
+        st.write(f"ATS cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['entries']} entries)")
+        session_stats = session_manager.stats()
+        st.write(f"Sessions: {session_stats['resident_count']} resident / {session_stats['session_count']} total, "
+                 f"RSS {session_stats['process_rss_bytes'] / 1e6:.0f} MB")
 
 # Page: Home
 if st.session_state.page == "Home":
@@ -58,35 +81,34 @@ if st.session_state.page == "Home":
                 help="Set the percentage you think your resume will score for ATS compatibility."
             )
             st.markdown("Enter your assumption of how well your resume will pass ATS screening. Compare it with the actual results on the ATS Analysis page.")
+            st.session_state.scoring_mode = st.selectbox(
+                "Scoring Mode", SCORING_MODES,
+                index=SCORING_MODES.index(st.session_state.scoring_mode),
+                help="auto: Gemini with offline fallback, gemini: Gemini only, local: fast deterministic scoring."
+            )
             if st.button("Analyze Resume", key="analyze_btn"):
                 if uploaded_file and job_title:
                     with st.spinner("Analyzing your resume..."):
                         try:
-                            os.makedirs("data", exist_ok=True)
-                            resume_path = "data/temp_resume.pdf"
-                            # Clear previous resume file
-                            if os.path.exists(resume_path):
-                                os.remove(resume_path)
                             # Clear previous analysis results
-                            st.session_state.ats_results = None
-                            st.session_state.chatbot = None
-                            st.session_state.chat_history = []
+                            session_manager.clear(session_id)
                             
-                            with open(resume_path, "wb") as f:
-                                f.write(uploaded_file.getbuffer())
+                            # Heavy pipeline dependencies are imported on the first analysis only
+                            from pipeline import run_analysis_pipeline
                             
-                            resume_text, sections = parse_pdf_resume(resume_path)
-                            if not resume_text:
-                                raise ValueError(f"Failed to parse resume: {sections}")
+                            # Parse, scrape, load the model and embed concurrently from the upload buffer
+                            result = run_analysis_pipeline(
+                                uploaded_file.getvalue(), job_title, job_description,
+                                scoring_mode=st.session_state.scoring_mode
+                            )
+                            logger.debug("Pipeline timings: %s", result.timings)
                             
-                            job_desc = get_job_description(job_title, job_description)
-                            ats_results = analyze_resume_with_gemini(resume_text, job_desc, job_title)
-                            vectorstore = create_embeddings(resume_text, ats_results)
-                            chatbot = initialize_chatbot(vectorstore, job_title)
-                            
-                            st.session_state.ats_results = ats_results
-                            st.session_state.chatbot = chatbot
-                            st.success("Analysis complete! Navigate to ATS Analysis or Chatbot pages.")
+                            session_manager.store_analysis(
+                                session_id, job_title, result.resume_key, result.ats_results,
+                                result.vectorstore, result.chatbot
+                            )
+                            st.session_state.pipeline_timings = result.timings
+                            st.success(f"Analysis complete in {result.wall_time:.1f}s! Navigate to ATS Analysis or Chatbot pages.")
                         except Exception as e:
                             logger.error(f"App error: {str(e)}")
                             st.error(f"Error: {str(e)}")
@@ -98,8 +120,8 @@ if st.session_state.page == "Home":
 elif st.session_state.page == "ATS Analysis":
     st.markdown("<div class='card'><h1>ATS Analysis Results</h1></div>", unsafe_allow_html=True)
     
-    if st.session_state.ats_results:
-        results = st.session_state.ats_results
+    if session.ats_results:
+        results = session.ats_results
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -142,31 +164,97 @@ elif st.session_state.page == "ATS Analysis":
 elif st.session_state.page == "Chatbot":
     st.markdown("<div class='card'><h1>Resume Advisor Chatbot</h1></div>", unsafe_allow_html=True)
     
-    if st.session_state.chatbot:
+    chatbot = None
+    if session.resume_key:
+        try:
+            # Rebuilt from the index store if this session's index was evicted while idle
+            with st.spinner("Restoring your resume index..."):
+                chatbot = session_manager.get_chatbot(session_id)
+        except Exception as e:
+            logger.error(f"Chatbot restore error: {str(e)}")
+            st.error(f"Could not restore your chatbot, please analyze the resume again: {str(e)}")
+    
+    if chatbot:
         with st.container():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
-            query = st.text_input("Ask about your resume or job role", placeholder="e.g., What skills should I add?")
-            if query:
-                with st.spinner("Generating response..."):
-                    try:
-                        response = st.session_state.chatbot(query)
-                        st.session_state.chat_history.append({"query": query, "response": response})
-                        st.markdown("**Chatbot Response**:")
-                        st.markdown(response, unsafe_allow_html=True)
-                    except Exception as e:
-                        logger.error(f"Chatbot error: {str(e)}")
-                        st.error(f"Chatbot error: {str(e)}")
+            # A cleared form submits each question once instead of re-asking it on every rerun
+            with st.form("chat_form", clear_on_submit=True):
+                query = st.text_input("Ask about your resume or job role", placeholder="e.g., What skills should I add?")
+                submitted = st.form_submit_button("Ask")
+            if submitted and query:
+                try:
+                    st.markdown("**Chatbot Response**:")
+                    # Stream tokens into the page as Gemini produces them
+                    response = st.write_stream(chatbot.stream(query))
+                    session_manager.add_chat(session_id, query, response)
+                    timing = chatbot.latencies[-1]
+                    st.caption(f"First token in {timing['time_to_first_token_s']:.2f}s, "
+                               f"full answer in {timing['total_s']:.2f}s"
+                               f"{' (cached)' if timing['cached'] else ''}")
+                except Exception as e:
+                    logger.error(f"Chatbot error: {str(e)}")
+                    st.error(f"Chatbot error: {str(e)}")
             st.markdown("</div>", unsafe_allow_html=True)
             
             with st.expander("Chat History", expanded=True):
                 st.markdown("<div class='card'>", unsafe_allow_html=True)
-                if st.session_state.chat_history:
-                    for i, chat in enumerate(st.session_state.chat_history):
-                        st.markdown(f"**Q{i+1}:** {chat['query']}")
-                        st.markdown(f"**A{i+1}:** {chat['response']}")
+                # Only the most recent exchanges are rendered; the manager caps what is kept
+                window, older = session_manager.chat_window(session_id, CHAT_WINDOW)
+                if window:
+                    if older:
+                        st.caption(f"{older} earlier exchanges not shown.")
+                    for number, chat in window:
+                        st.markdown(f"**Q{number}:** {chat['query']}")
+                        st.markdown(f"**A{number}:** {chat['response']}")
                         st.markdown("---")
                 else:
                     st.write("No chat history available yet.")
                 st.markdown("</div>", unsafe_allow_html=True)
     else:
-        st.info("No chatbot available. Please analyze a resume on the Home page.")
\ No newline at end of file
+        st.info("No chatbot available. Please analyze a resume on the Home page.")
+
+# Page: Admin
+elif st.session_state.page == "Admin" and ADMIN_PAGE:
+    st.markdown("<div class='card'><h1>Pipeline Metrics</h1></div>", unsafe_allow_html=True)
+    
+    stages = metrics_snapshot()["stages"]
+    if stages:
+        st.dataframe([
+            {
+                "stage": name,
+                "count": stage["count"],
+                "errors": stage["errors"],
+                "avg ms": round(stage["avg_s"] * 1000, 1),
+                "max ms": round(stage["max_s"] * 1000, 1),
+                **stage["totals"],
+            }
+            for name, stage in sorted(stages.items())
+        ], use_container_width=True)
+    else:
+        st.info("No spans recorded yet. Run an analysis or ask the chatbot a question.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Download JSON", export_json(), file_name="metrics.json", mime="application/json")
+    with col2:
+        st.download_button("Download Prometheus", export_prometheus(), file_name="metrics.prom", mime="text/plain")
+    with col3:
+        if st.button("Reset Metrics"):
+            reset_metrics()
+            st.rerun()
+    
+    with st.expander("Prometheus Text"):
+        st.code(export_prometheus(), language="text")
+    
+    st.markdown("### Session Memory")
+    session_manager.sweep()
+    session_stats = session_manager.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Process RSS", f"{session_stats['process_rss_bytes'] / 1e6:.0f} MB")
+    col2.metric("Session State", f"{session_stats['estimated_bytes'] / 1e6:.1f} MB",
+                help=f"Budget {session_stats['budget_bytes'] / 1e6:.0f} MB, "
+                     f"{session_stats['session_budget_bytes'] / 1e6:.0f} MB per session")
+    col3.metric("Resident Sessions", f"{session_stats['resident_count']} / {session_stats['session_count']}")
+    col4.metric("Evictions / Restores", f"{session_stats['evictions']} / {session_stats['restores']}")
+    if session_stats["sessions"]:
+        st.dataframe(session_stats["sessions"], use_container_width=True)
@@ -1,77 +1,104 @@
 import logging
 import os
-from dotenv import load_dotenv
 import json
-import google.generativeai as genai
+import sqlite3
+from analysis_cache import get_analysis_cache, make_cache_key
+from metrics import span
+from gemini_client import get_gemini_client
+from prompt_builder import ATS_RESPONSE_SCHEMA, build_ats_prompt, parse_ats_response
+from util import setup_logging
 
 # Setup logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = setup_logging(__name__)
 
-# Load environment variables
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY is missing in environment variables.")
+MODEL_NAME = "gemini-1.5-flash"
+# Bump whenever the prompt changes so stale cached analyses are not reused
+PROMPT_VERSION = 2
+MAX_OUTPUT_TOKENS = 1500
+# "gemini", "local", or "auto" (Gemini with the local scorer as fallback)
+SCORING_MODES = ("auto", "gemini", "local")
+DEFAULT_SCORING_MODE = os.getenv("ATS_SCORING_MODE", "auto")
 
-# Configure Gemini
-genai.configure(api_key=GOOGLE_API_KEY)
+def analyze_resume(resume_text, job_description, job_title, sections=None, mode=None):
+    mode = mode or DEFAULT_SCORING_MODE
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode: {mode}")
+    if mode == "local":
+        # Imported on demand so numpy isn't loaded until local scoring is needed
+        from local_scorer import score_resume_locally
+        return score_resume_locally(resume_text, job_description, job_title, sections)
+    try:
+        return analyze_resume_with_gemini(resume_text, job_description, job_title, sections=sections)
+    except RuntimeError as e:
+        if mode == "gemini":
+            raise
+        logger.warning(f"Gemini analysis failed, falling back to local scorer: {str(e)}")
+        from local_scorer import score_resume_locally
+        return score_resume_locally(resume_text, job_description, job_title, sections)
+
+def _open_cache():
+    try:
+        return get_analysis_cache()
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"ATS cache unavailable, analyzing without it: {str(e)}")
+        return None
 
-def analyze_resume_with_gemini(resume_text, job_description, job_title):
+def analyze_resume_with_gemini(resume_text, job_description, job_title, use_cache=True, sections=None):
     if not resume_text or not job_description:
         logger.error("Resume text or job description missing")
         raise ValueError("Resume text and job description are required")
     
+    cache = _open_cache() if use_cache else None
+    cache_key = make_cache_key(resume_text, job_description, job_title, MODEL_NAME, PROMPT_VERSION)
+    if cache is not None:
+        try:
+            cached = cache.get(cache_key)
+        except (sqlite3.Error, ValueError) as e:
+            # A locked or corrupt cache is a miss, never a failed analysis
+            logger.error(f"ATS cache read failed: {str(e)}")
+            cached = None
+        if cached is not None:
+            logger.debug("ATS analysis cache hit")
+            return cached
+    
     try:
-        # Initialize Gemini model
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Prompt for ATS analysis
-        prompt = f"""
-        You are an ATS (Applicant Tracking System) analyzer for a {job_title} role. 
-        Analyze the resume and job description to calculate:
-        - ATS compatibility út (0-100%)
-        - Relevant skills
-        - Keywords
-        - Trending skills
-        - Trending keywords
-        - Suggestions for improvement
-        
-        Return the response strictly in JSON format:
-        {{
-            "ats_compatibility_score": int,
-            "skills": [],
-            "keywords": [],
-            "trending_skills": [],
-            "trending_keywords": [],
-            "suggestions": []
-        }}
-        
-        Resume: {resume_text}
-        Job Description: {job_description}
-        """
+        # Normalized, deduplicated and token-budgeted prompt
+        prompt = build_ats_prompt(resume_text, job_description, job_title, sections)
 
-        # Generate response
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "max_output_tokens": 1000,
-                "temperature": 0.3
-            }
-        )
+        # Generate response through the shared rate-limited client
+        with span("gemini_call", prompt_chars=len(prompt)) as trace:
+            response = get_gemini_client().generate(
+                prompt,
+                MODEL_NAME,
+                generation_config={
+                    "max_output_tokens": MAX_OUTPUT_TOKENS,
+                    "temperature": 0.3,
+                    # Structured output mode constrains the reply to the ATS schema
+                    "response_mime_type": "application/json",
+                    "response_schema": ATS_RESPONSE_SCHEMA
+                }
+            )
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None:
+                trace["prompt_tokens"] = usage.prompt_token_count
+                trace["output_tokens"] = usage.candidates_token_count
         
-        # Extract and parse the result
-        result_text = response.text.strip()
+        # Extract and parse the result, repairing truncated or wrapped JSON
+        result_text = response.text
         try:
-            # Remove markdown code block markers if present
-            if result_text.startswith("```json") and result_text.endswith("```"):
-                result_text = result_text[7:-3].strip()
-            result = json.loads(result_text)
-        except json.JSONDecodeError as e:
+            result, complete = parse_ats_response(result_text)
+        except (json.JSONDecodeError, ValueError) as e:
             logger.error(f"Failed to parse JSON from Gemini response: {str(e)}")
             raise ValueError(f"Gemini returned invalid JSON: {result_text}")
         
-        logger.debug(f"ATS analysis result: {result}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ATS analysis result: %s", result)
+        # Repaired or incomplete replies are served once but not cached, so a retry can do better
+        if cache is not None and complete:
+            try:
+                cache.set(cache_key, result)
+            except sqlite3.Error as e:
+                logger.error(f"ATS cache write failed: {str(e)}")
         return result
 
     except Exception as e:
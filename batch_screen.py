@@ -0,0 +1,166 @@
+"""Headless batch screening: rank a folder of PDF resumes against one job description.
+
+Usage:
+    python batch_screen.py resumes/ --job-title "Data Engineer" --jd-file jd.txt --output results.jsonl
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pdf_parser import parse_pdf_records
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+RESULT_FIELDS = ["rank", "file", "score", "similarity", "skills", "error"]
+
+def _parse_worker(pdf_path):
+    # Runs in a worker process; only the compact section records cross the process boundary,
+    # never the full resume text, which screening doesn't use
+    try:
+        return pdf_path, parse_pdf_records(pdf_path), None
+    except Exception as e:
+        return pdf_path, None, str(e)
+
+def find_resumes(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+class ResultWriter:
+    """Append rows to a JSONL or CSV file as they become available."""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            row = dict(row, skills="; ".join(row.get("skills") or []))
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def score_batch(batch, jd_vector, batch_size):
+    # Lazy import keeps worker processes from loading the embedding model
+    from embedder import encode_resume_sections
+
+    # Section centroids, so candidates aren't ranked on the first ~256 tokens of their resume
+    encoded = encode_resume_sections([(None, records) for _, records in batch], batch_size=batch_size)
+    rows = []
+    for (path, records), (_, _, centroid) in zip(batch, encoded):
+        similarity = float(centroid @ jd_vector)
+        skills = next((list(record.items) for record in records if record.section == "skills"), [])
+        rows.append({
+            "file": path,
+            "score": round(max(similarity, 0.0) * 100, 1),
+            "similarity": similarity,
+            "skills": skills,
+            "error": None,
+        })
+    return rows
+
+def screen_resumes(pdf_paths, job_description, output_path, ranked_path=None, workers=None, embed_batch_size=64):
+    """Parse, embed and score resumes; stream rows to output_path and return them ranked."""
+    from embedder import encode_texts, normalize_rows
+
+    jd_vector = normalize_rows(encode_texts([job_description]))[0]
+    writer = ResultWriter(output_path)
+    results, pending = [], []
+    failures = 0
+    total = len(pdf_paths)
+    start = time.perf_counter()
+
+    def flush_pending():
+        for row in score_batch(pending, jd_vector, embed_batch_size):
+            writer.write(row)
+            results.append(row)
+        pending.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_worker, path) for path in pdf_paths]
+            for done, future in enumerate(as_completed(futures), start=1):
+                path, records, error = future.result()
+                if error or not records:
+                    failures += 1
+                    row = {"file": path, "score": None, "similarity": None, "skills": [], "error": error or "empty resume"}
+                    writer.write(row)
+                    logger.warning("Failed to parse %s: %s", path, row["error"])
+                else:
+                    pending.append((path, records))
+                    if len(pending) >= embed_batch_size:
+                        flush_pending()
+                if done % 10 == 0 or done == total:
+                    elapsed = time.perf_counter() - start
+                    logger.info("Processed %d/%d resumes (%d failed, %.1f resumes/sec)",
+                                done, total, failures, done / elapsed if elapsed else 0.0)
+            if pending:
+                flush_pending()
+    finally:
+        writer.close()
+
+    ranked = sorted(results, key=lambda row: row["score"], reverse=True)
+    for rank, row in enumerate(ranked, start=1):
+        row["rank"] = rank
+    if ranked_path:
+        ranked_writer = ResultWriter(ranked_path)
+        try:
+            for row in ranked:
+                ranked_writer.write(row)
+        finally:
+            ranked_writer.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Screened %d resumes in %.1fs (%.1f resumes/sec), %d failed",
+                total, elapsed, total / elapsed if elapsed else 0.0, failures)
+    return ranked
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a folder of PDF resumes against a job description.")
+    parser.add_argument("folder", help="Folder containing PDF resumes (searched recursively)")
+    parser.add_argument("--job-title", required=True, help="Job title to screen for")
+    parser.add_argument("--jd-file", help="File containing the job description (scraped from the title if omitted)")
+    parser.add_argument("--output", default="screening_results.jsonl", help="Streaming results file (.jsonl or .csv)")
+    parser.add_argument("--ranked-output", help="Final ranked results file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Resumes per embedding batch")
+    parser.add_argument("--top", type=int, default=10, help="Number of top candidates to print")
+    args = parser.parse_args(argv)
+
+    user_job_description = ""
+    if args.jd_file:
+        with open(args.jd_file, encoding="utf-8") as f:
+            user_job_description = f.read()
+    from web_scraper import get_job_description
+    job_description = get_job_description(args.job_title, user_job_description)
+
+    pdf_paths = find_resumes(args.folder)
+    if not pdf_paths:
+        logger.error("No PDF resumes found in %s", args.folder)
+        return 1
+
+    ranked = screen_resumes(pdf_paths, job_description, args.output, args.ranked_output,
+                            workers=args.workers, embed_batch_size=args.batch_size)
+    for row in ranked[:args.top]:
+        print(f"{row['rank']:>4}. {row['score']:>5.1f}  {row['file']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Synthetic resumes and local stand-ins for Gemini, the job boards and the embedding model."""
+import hashlib
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SKILLS = ["Python", "SQL", "Spark", "Airflow", "AWS", "Docker", "Kubernetes", "TensorFlow", "PyTorch",
+          "Pandas", "NumPy", "Scikit-learn", "Git", "Linux", "Terraform", "Kafka", "Tableau", "React"]
+VERBS = ["Built", "Designed", "Led", "Optimized", "Migrated", "Automated", "Shipped", "Scaled"]
+OBJECTS = ["data pipelines", "ML models", "REST APIs", "dashboards", "ETL jobs", "microservices",
+           "feature stores", "CI/CD workflows"]
+
+# Lines of experience per resume size; large resumes spill onto many pages
+RESUME_SIZES = {"small": 6, "medium": 40, "large": 250}
+
+JOB_DESCRIPTION_HTML = """<html><body>
+<div class="nav">Jobs Home Sign in</div>
+<section class="job-description">We are hiring a {title}. You will build data pipelines with Python, SQL
+and Spark, deploy services with Docker and Kubernetes on AWS, and work with Airflow and Kafka.
+Experience with ML models in PyTorch or TensorFlow is a plus. Strong communication skills required.</section>
+<div class="job-details">Full time. Remote friendly. Competitive salary and equity.</div>
+</body></html>"""
+
+def synthetic_resume_lines(size="small", seed=0):
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", "Contact", f"candidate{seed}@example.com", "Skills",
+             ", ".join(rng.sample(SKILLS, 8)), "Experience"]
+    year = 2024
+    for i in range(RESUME_SIZES[size]):
+        if i % 5 == 0:
+            lines.append(f"{year - 2} - {year}")
+            lines.append(f"Engineer at Company {rng.randint(1, 500)}")
+            year -= 2
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, "
+                     f"improving throughput by {rng.randint(5, 80)}%")
+    lines += ["Education", "B.Sc. Computer Science, State University", "Certifications", "AWS Solutions Architect"]
+    return lines
+
+def synthetic_resume_pdf(size="small", seed=0, lines_per_page=45):
+    """Render a synthetic resume to PDF bytes with PyMuPDF."""
+    import fitz
+
+    lines = synthetic_resume_lines(size, seed)
+    doc = fitz.open()
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        y = 50
+        for line in lines[start:start + lines_per_page]:
+            page.insert_text((50, y), line, fontsize=10)
+            y += 15
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+class _Usage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+class _StubResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = _Usage(len(prompt) // 4, len(text) // 4)
+
+class StubGeminiBackend:
+    """Deterministic GeminiClient backend with a fixed simulated latency."""
+
+    def __init__(self, latency=0.05, chunks=5):
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model_name, prompt, generation_config, stream):
+        import time
+
+        with self._lock:
+            self.calls += 1
+        digest = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            text = json.dumps({
+                "ats_compatibility_score": 50 + digest % 50,
+                "skills": SKILLS[:5],
+                "keywords": ["data pipelines", "python"],
+                "trending_skills": ["Kubernetes"],
+                "trending_keywords": ["MLOps"],
+                "suggestions": ["Quantify your impact."],
+            })
+        else:
+            text = "Focus on quantified impact and mirror the job description's core skills. " * 3
+        if not stream:
+            time.sleep(self.latency)
+            return _StubResponse(text, prompt)
+        return self._stream(text, prompt)
+
+    def _stream(self, text, prompt):
+        import time
+
+        step = max(1, len(text) // self.chunks)
+        for start in range(0, len(text), step):
+            time.sleep(self.latency / self.chunks)
+            yield _StubResponse(text[start:start + step], prompt)
+
+class FakeSentenceTransformer:
+    """Hash-based stand-in for SentenceTransformer so benchmarks run without model downloads."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=32, convert_to_tensor=False):
+        import numpy as np
+
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+            vectors[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return vectors
+
+class _JobBoardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = JOB_DESCRIPTION_HTML.format(title="Data Engineer").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureServer:
+    """Local HTTP server standing in for LinkedIn and Indeed."""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _JobBoardHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,159 @@
+"""Offline benchmark suite for the analysis entry points.
+
+Gemini, LinkedIn/Indeed and (optionally) the embedding model are replaced with local fakes,
+so results are reproducible and cost no API quota.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --iterations 20 --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fixtures import FakeSentenceTransformer, FixtureServer, StubGeminiBackend, synthetic_resume_pdf
+from startup_benchmark import compare
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+JOB_TITLE = "Data Engineer"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def measure(name, fn, iterations, warmup=1):
+    """Time fn(i) over iterations, then re-run once under tracemalloc for peak memory."""
+    for i in range(warmup):
+        fn(-1 - i)
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - call_start)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "p50_s": percentile(samples, 50),
+        "p95_s": percentile(samples, 95),
+        "throughput_per_s": iterations / total if total else 0.0,
+        "peak_memory_kb": peak / 1024,
+    }
+    print(f"{name:<32} p50 {result['p50_s'] * 1000:>8.1f} ms  p95 {result['p95_s'] * 1000:>8.1f} ms  "
+          f"{result['throughput_per_s']:>8.1f}/s  peak {result['peak_memory_kb']:>9.0f} KiB")
+    return result
+
+def install_stubs(work_dir, server_url, fake_embeddings, gemini_latency):
+    """Point every external dependency at a local fake."""
+    os.environ["ATS_CACHE_PATH"] = os.path.join(work_dir, "ats_cache.sqlite3")
+
+    import gemini_client
+    import web_scraper
+
+    gemini_client._default_client = gemini_client.GeminiClient(
+        backend=StubGeminiBackend(latency=gemini_latency), requests_per_minute=1e9, burst=1000)
+    web_scraper.LINKEDIN_BASE_URL = server_url
+    web_scraper.INDEED_BASE_URL = server_url
+
+    if fake_embeddings:
+        import embedder
+        embedder._models[embedder.EMBEDDING_MODEL_NAME] = FakeSentenceTransformer()
+
+def run(iterations, sizes, fake_embeddings, gemini_latency):
+    import vector_store
+    from pdf_parser import parse_pdf_resume
+    from web_scraper import get_job_description, clear_cache
+    from ats_analyzer import analyze_resume_with_gemini
+    from embedder import create_embeddings
+    from chatbot import initialize_chatbot
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir, FixtureServer() as server:
+        install_stubs(work_dir, server.url, fake_embeddings, gemini_latency)
+
+        pdfs = {size: synthetic_resume_pdf(size, seed=7) for size in sizes}
+        for size, data in pdfs.items():
+            results[f"parse_pdf_resume[{size}]"] = measure(
+                f"parse_pdf_resume[{size}]", lambda i, data=data: parse_pdf_resume(data), iterations)
+
+        def scrape(i):
+            # Clear the title cache so every iteration hits the fixture server
+            clear_cache()
+            return get_job_description(JOB_TITLE, "")
+        results["get_job_description"] = measure("get_job_description", scrape, iterations)
+
+        job_description = get_job_description(JOB_TITLE, "")
+        resume_text, sections = parse_pdf_resume(pdfs[sizes[-1]])
+
+        results["analyze_resume_with_gemini"] = measure(
+            "analyze_resume_with_gemini",
+            lambda i: analyze_resume_with_gemini(resume_text, job_description, JOB_TITLE,
+                                                 use_cache=False, sections=sections),
+            iterations)
+        ats_results = analyze_resume_with_gemini(resume_text, job_description, JOB_TITLE, use_cache=False)
+
+        def embed(i):
+            # A fresh store per iteration measures cold embedding rather than the dedup hit
+            vector_store._default_store = vector_store.VectorIndexStore(os.path.join(work_dir, f"store_{i}"))
+            return create_embeddings(resume_text, ats_results, sections=sections)
+        results["create_embeddings"] = measure("create_embeddings", embed, iterations)
+
+        chatbot = initialize_chatbot(embed(-100), JOB_TITLE)
+        results["chatbot_query"] = measure(
+            "chatbot_query", lambda i: chatbot(f"What should I improve for this role? ({i})"), iterations)
+        vector_store._default_store.flush()
+    return results
+
+def flatten(results):
+    return {f"{name}:{metric}": value for name, metrics in results.items()
+            for metric, value in metrics.items() if metric in ("p50_s", "p95_s", "peak_memory_kb")}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline latency/throughput/memory benchmarks.")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--sizes", default="small,medium,large", help="Synthetic resume sizes to parse")
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the real SentenceTransformer model")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Simulated Gemini latency in seconds")
+    parser.add_argument("--output", help="Write full results as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio before flagging")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.sizes.split(","), not args.real_embeddings, args.gemini_latency)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    flat = flatten(results)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(flat, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(flat, baseline, args.tolerance)
+        for name, (reference, value) in regressions.items():
+            print(f"REGRESSION {name}: {reference:.4f} -> {value:.4f}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Cold-start benchmark: per-module import time and time-to-first-render of app.py.
+
+Every measurement runs in a fresh interpreter so module caches don't hide regressions.
+
+Usage:
+    python benchmarks/startup_benchmark.py --save-baseline
+    python benchmarks/startup_benchmark.py --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "startup_baseline.json")
+
+# Modules imported by app.py at startup, then the ones deferred to the first analysis
+MODULES = ["util", "metrics", "analysis_cache", "ats_analyzer", "embedder",
+           "chatbot", "pdf_parser", "web_scraper", "pipeline"]
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=120)
+app.run()
+if app.exception:
+    raise SystemExit(str(app.exception))
+print(time.perf_counter() - start)
+"""
+
+def _run_timed(snippet):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, LOG_LEVEL="WARNING")
+    completed = subprocess.run([sys.executable, "-c", snippet], cwd=REPO_ROOT, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or completed.stdout.strip())
+    return float(completed.stdout.strip().splitlines()[-1])
+
+def measure(repeats=3, include_render=True):
+    results = {}
+    for module in MODULES:
+        try:
+            samples = [_run_timed(IMPORT_SNIPPET.format(module=module)) for _ in range(repeats)]
+            results[f"import:{module}"] = statistics.median(samples)
+        except RuntimeError as e:
+            print(f"skipping import:{module}: {str(e).splitlines()[-1]}", file=sys.stderr)
+    if include_render:
+        try:
+            samples = [_run_timed(RENDER_SNIPPET) for _ in range(repeats)]
+            results["first_render"] = statistics.median(samples)
+        except RuntimeError as e:
+            print(f"skipping first_render: {str(e).splitlines()[-1]}", file=sys.stderr)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the metrics that are slower than baseline by more than tolerance (ratio)."""
+    regressions = {}
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference and value > reference * (1 + tolerance):
+            regressions[name] = (reference, value)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-render.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-render", action="store_true", help="Skip the Streamlit first-render measurement")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio before flagging")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeats, include_render=not args.no_render)
+    for name, value in results.items():
+        print(f"{name:<28} {value * 1000:>9.1f} ms")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, (reference, value) in regressions.items():
+            print(f"REGRESSION {name}: {reference * 1000:.1f} ms -> {value * 1000:.1f} ms")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,167 @@
-from util import setup_logging, configure_gemini
+import threading
+import time
+from collections import OrderedDict, deque
+from metrics import span, record_span
+from gemini_client import QueueFullError, get_gemini_client
+from util import setup_logging
 
 # Setup logging
-logger = setup_logging()
+logger = setup_logging(__name__)
 
-# Configure Gemini
-genai = configure_gemini()
+CHAT_MODEL_NAME = "gemini-1.5-flash"
+CHAT_GENERATION_CONFIG = {
+    "max_output_tokens": 500,
+    "temperature": 0.5
+}
+# Per-chatbot LRU sizes for repeated questions
+QUERY_CACHE_SIZE = 128
+ANSWER_CACHE_SIZE = 64
+LATENCY_HISTORY_SIZE = 100
+# Boxed Python float in a list: 8-byte pointer plus a 24-byte float object
+PY_FLOAT_BYTES = 32
 
-def initialize_chatbot(vectorstore, job_title):
-    if vectorstore is None:
-        logger.error("Vectorstore is None")
-        raise ValueError("Valid vectorstore is required")
-    
-    def chatbot(query):
-        if not query:
-            logger.error("Query is empty")
-            raise ValueError("Query is required")
-        
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-        docs = retriever.get_relevant_documents(query)
-        context = "\n".join([doc.page_content for doc in docs])
+def _normalize_query(query):
+    return " ".join(query.lower().split())
+
+class _LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
 
-        prompt = f"""
-        You are an expert resume advisor for a {job_title} role.
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+class Chatbot:
+    """Resume advisor bound to one vectorstore; callable like the original closure."""
+
+    def __init__(self, vectorstore, job_title, k=3):
+        self.vectorstore = vectorstore
+        self.job_title = job_title
+        self.k = k
+        # Shared, rate-limited client; the underlying model is built once per process
+        self.client = get_gemini_client()
+        self._query_embeddings = _LRUCache(QUERY_CACHE_SIZE)
+        self._answers = _LRUCache(ANSWER_CACHE_SIZE)
+        self.latencies = deque(maxlen=LATENCY_HISTORY_SIZE)
+
+    def estimated_bytes(self):
+        """Approximate memory held by this chatbot's query-embedding and answer caches."""
+        embeddings = sum(len(embedding) * PY_FLOAT_BYTES for embedding in self._query_embeddings.values())
+        answers = sum(len(answer) for answer in self._answers.values())
+        return embeddings + answers
+
+    def _retrieve(self, query):
+        key = _normalize_query(query)
+        with span("chat_retrieval") as trace:
+            embedding = self._query_embeddings.get(key)
+            trace["embedding_cache_hits"] = int(embedding is not None)
+            if embedding is None:
+                embedding = self.vectorstore.embedding_function.embed_query(query)
+                self._query_embeddings.set(key, embedding)
+            docs = self.vectorstore.similarity_search_by_vector(embedding, k=self.k)
+            context = "\n".join([doc.page_content for doc in docs])
+            trace["context_chars"] = len(context)
+        return context
+
+    def _build_prompt(self, query, context):
+        return f"""
+        You are an expert resume advisor for a {self.job_title} role.
         Use the following context from the resume and ATS analysis to answer the query.
-        
+
         Context: {context}
-        
+
         Query: {query}
-        
+
         Keep responses concise, ATS-optimized, and highly role-specific.
         """
 
+    def _record(self, start, first_token_at, cached=False):
+        end = time.perf_counter()
+        timing = {
+            "time_to_first_token_s": (first_token_at or end) - start,
+            "total_s": end - start,
+            "cached": cached,
+        }
+        self.latencies.append(timing)
+        logger.debug("Chatbot answer timing: %s", timing)
+        return timing
+
+    def stream(self, query):
+        """Yield the answer in chunks as Gemini generates them."""
+        if not query:
+            logger.error("Query is empty")
+            raise ValueError("Query is required")
+
+        start = time.perf_counter()
+        answer_key = _normalize_query(query)
+        cached = self._answers.get(answer_key)
+        if cached is not None:
+            self._record(start, time.perf_counter(), cached=True)
+            yield cached
+            return
+
+        context = self._retrieve(query)
+        prompt = self._build_prompt(query, context)
         try:
-            # Initialize Gemini model
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            # Generate response
-            response = model.generate_content(
+            response = self.client.generate_stream(
                 prompt,
-                generation_config={
-                    "max_output_tokens": 500,
-                    "temperature": 0.5
-                }
+                CHAT_MODEL_NAME,
+                generation_config=CHAT_GENERATION_CONFIG
             )
-            result = response.text.strip()
-            logger.debug(f"Chatbot response: {result[:100]}...")
-            return result
+            parts = []
+            first_token_at = None
+            usage = None
+            generation_start = time.perf_counter()
+            for chunk in response:
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                text = chunk.text
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(text)
+                yield text
+        except QueueFullError:
+            # Backpressure, not a failure: callers map it to a retryable response
+            record_span("chat_generation", time.perf_counter() - start, error=True)
+            raise
         except Exception as e:
+            record_span("chat_generation", time.perf_counter() - start, error=True)
             logger.error(f"Chatbot response error: {str(e)}")
             raise RuntimeError(f"Failed to get chatbot response: {str(e)}")
 
-    return chatbot
\ No newline at end of file
+        result = "".join(parts).strip()
+        record_span("chat_generation", time.perf_counter() - generation_start, {
+            "prompt_chars": len(prompt),
+            "output_chars": len(result),
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        })
+        self._answers.set(answer_key, result)
+        self._record(start, first_token_at)
+        logger.debug("Chatbot response: %s...", result[:100])
+
+    def __call__(self, query):
+        return "".join(self.stream(query)).strip()
+
+def initialize_chatbot(vectorstore, job_title):
+    if vectorstore is None:
+        logger.error("Vectorstore is None")
+        raise ValueError("Valid vectorstore is required")
+
+    return Chatbot(vectorstore, job_title)
@@ -1,45 +1,311 @@
-import logging
-from sentence_transformers import SentenceTransformer
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from langchain.embeddings.base import Embeddings  # Import LangChain's Embeddings base class
+import threading
+import time
+from metrics import span
+from util import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = setup_logging(__name__)
 
-class SentenceTransformerEmbeddings(Embeddings):  # Inherit from Embeddings
-    def __init__(self, model_name):
-        self.model = SentenceTransformer(model_name)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
-    def embed_documents(self, texts):
-        """Embed a list of documents."""
-        return self.model.encode(texts, convert_to_tensor=False).tolist()
+# Process-wide model registry, shared by every Streamlit session
+_models = {}
+_model_lock = threading.Lock()
+_encode_lock = threading.Lock()
+# Separate from _model_lock so stats reads never wait on a model load
+_stats_lock = threading.Lock()
+_embeddings_cls = None
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+_stats = {
+    "model_loads": 0,
+    "load_time_s": 0.0,
+    "encode_calls": 0,
+    "encoded_texts": 0,
+    "encode_time_s": 0.0,
+    "last_encode_s": 0.0,
+}
 
-    def embed_query(self, text):
-        """Embed a single query."""
-        return self.model.encode([text], convert_to_tensor=False).tolist()[0]
+def get_embedding_model(model_name=EMBEDDING_MODEL_NAME):
+    """Return the shared SentenceTransformer, loading and warming it on first use."""
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _model_lock:
+        model = _models.get(model_name)
+        if model is None:
+            start = time.perf_counter()
+            # torch/sentence_transformers are only imported once a stage needs embeddings
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            # Warm up so the first real request doesn't pay for lazy initialization
+            model.encode(["warm-up"], convert_to_tensor=False)
+            elapsed = time.perf_counter() - start
+            with _stats_lock:
+                _stats["model_loads"] += 1
+                _stats["load_time_s"] += elapsed
+            _models[model_name] = model
+            logger.info("Loaded embedding model %s in %.2fs", model_name, elapsed)
+    return model
 
-def create_embeddings(resume_text, ats_results, persist_directory="./data/faiss_db"):
+def encode_texts(texts, model_name=EMBEDDING_MODEL_NAME, batch_size=32):
+    """Encode texts with the shared model; safe to call from concurrent sessions."""
+    model = get_embedding_model(model_name)
+    start = time.perf_counter()
+    with span("embed", texts=len(texts), chars=sum(len(t) for t in texts)), _encode_lock:
+        vectors = model.encode(texts, batch_size=batch_size, convert_to_tensor=False)
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        _stats["encode_calls"] += 1
+        _stats["encoded_texts"] += len(texts)
+        _stats["encode_time_s"] += elapsed
+        _stats["last_encode_s"] = elapsed
+    return vectors
+
+def normalize_rows(vectors):
+    """Rows scaled to unit length as float32, so dot products are cosine similarities."""
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def section_items(sections):
+    """(section, items) pairs from a parse_pdf_resume sections dict or parse_pdf_records records."""
+    if isinstance(sections, dict):
+        return list(sections.items())
+    return [(record.section, record.items) for record in sections or ()]
+
+def encode_resume_sections(resumes, batch_size=32):
+    """(section_names, unit section vectors, unit centroid) for each (resume_text, sections) pair.
+
+    Sections may be a sections dict or SectionRecords; resume_text is only used when there are
+    none. Sections are encoded separately so a long resume isn't cut off at the model's input
+    limit; every resume's sections share one encode call.
+    """
+    names_per_resume, texts = [], []
+    for resume_text, sections in resumes:
+        pairs = [(name, items) for name, items in section_items(sections) if items]
+        names = [name for name, _ in pairs]
+        section_texts = [" ".join(items) for _, items in pairs]
+        if not section_texts:
+            names, section_texts = ["resume"], [resume_text or ""]
+        names_per_resume.append(names)
+        texts.extend(section_texts)
+    if not texts:
+        return []
+
+    vectors = normalize_rows(encode_texts(texts, batch_size=batch_size))
+    encoded, offset = [], 0
+    for names in names_per_resume:
+        section_vectors = vectors[offset:offset + len(names)]
+        offset += len(names)
+        centroid = normalize_rows(section_vectors.mean(axis=0, keepdims=True))[0]
+        encoded.append((names, section_vectors, centroid))
+    return encoded
+
+def warm_up_in_background(model_name=EMBEDDING_MODEL_NAME):
+    """Start loading the shared model on a daemon thread so page renders aren't blocked."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None and model_name not in _models:
+            _warm_up_thread = threading.Thread(target=get_embedding_model, args=(model_name,),
+                                               name="embedding-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+def get_embedding_stats():
+    """Snapshot of model load time and encode latency counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    calls = stats["encode_calls"]
+    stats["avg_encode_s"] = stats["encode_time_s"] / calls if calls else 0.0
+    stats["loaded_models"] = sorted(_models)
+    return stats
+
+def _embeddings_class():
+    # Defined on first use so importing this module doesn't pull in LangChain
+    global _embeddings_cls
+    if _embeddings_cls is None:
+        from langchain_core.embeddings import Embeddings
+
+        class SentenceTransformerEmbeddings(Embeddings):  # Inherit from Embeddings
+            def __init__(self, model_name=EMBEDDING_MODEL_NAME):
+                self.model_name = model_name
+                self.model = get_embedding_model(model_name)
+
+            def embed_documents(self, texts):
+                """Embed a list of documents."""
+                return encode_texts(texts, self.model_name).tolist()
+
+            def embed_query(self, text):
+                """Embed a single query."""
+                return encode_texts([text], self.model_name).tolist()[0]
+
+        _embeddings_cls = SentenceTransformerEmbeddings
+    return _embeddings_cls
+
+def __getattr__(name):
+    if name == "SentenceTransformerEmbeddings":
+        return _embeddings_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Upper bound on characters per indexed chunk (~200 tokens for MiniLM)
+MAX_CHUNK_CHARS = 800
+
+def _chunk_lines(lines, max_chars=MAX_CHUNK_CHARS):
+    """Greedily pack lines into chunks no longer than max_chars."""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        # Hard-split single lines that exceed the budget on their own
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            chunks.append(line[:cut].strip())
+            line = line[cut:].strip()
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def build_resume_documents(resume_text, sections=None, max_chunk_chars=MAX_CHUNK_CHARS):
+    """Split a resume into section- and experience-entry-level Documents."""
+    from langchain_core.documents import Document
+
+    documents = []
+    if sections and any(sections.values()):
+        for section, items in sections.items():
+            if not items:
+                continue
+            if section == "experience":
+                # Each experience entry is its own retrievable unit
+                for entry_index, entry in enumerate(items):
+                    for chunk in _chunk_lines([entry], max_chunk_chars):
+                        documents.append(Document(page_content=f"{section}: {chunk}", metadata={
+                            "source": "resume", "section": section, "entry": entry_index}))
+            else:
+                for chunk in _chunk_lines(items, max_chunk_chars):
+                    documents.append(Document(page_content=f"{section}: {chunk}", metadata={
+                        "source": "resume", "section": section}))
+    else:
+        for chunk in _chunk_lines(resume_text.split("\n"), max_chunk_chars):
+            documents.append(Document(page_content=chunk, metadata={"source": "resume", "section": "resume"}))
+    return documents
+
+def build_ats_documents(ats_results, max_chunk_chars=MAX_CHUNK_CHARS):
+    """One Document per ATS result field."""
+    from langchain_core.documents import Document
+
+    documents = []
+    for key, value in ats_results.items():
+        if key == "ats_compatibility_score" or isinstance(value, dict):
+            continue
+        text = f"{key}: {', '.join(map(str, value)) if isinstance(value, list) else value}"
+        for chunk in _chunk_lines([text], max_chunk_chars):
+            documents.append(Document(page_content=chunk, metadata={"source": "ats", "section": key}))
+    if "ats_compatibility_score" in ats_results:
+        documents.append(Document(
+            page_content=f"ats_compatibility_score: {ats_results['ats_compatibility_score']}%",
+            metadata={"source": "ats", "section": "ats_compatibility_score"}))
+    return documents
+
+def build_documents(resume_text, ats_results, sections=None, max_chunk_chars=MAX_CHUNK_CHARS):
+    """Split a resume into section- and entry-level Documents plus one Document per ATS field."""
+    return (build_resume_documents(resume_text, sections, max_chunk_chars)
+            + build_ats_documents(ats_results, max_chunk_chars))
+
+def embed_documents(documents):
+    """Encode Documents ahead of index construction, e.g. while ATS analysis is still running."""
+    return encode_texts([doc.page_content for doc in documents]).tolist()
+
+def _save_vectorstore(vectorstore, persist_directory):
+    with span("faiss_save", documents=len(vectorstore.index_to_docstore_id)):
+        vectorstore.save_local(persist_directory)
+
+def load_resume_documents(resume_key):
+    """Stored resume chunks and vectors for resume_key, or None if the index store doesn't have them."""
+    from langchain_core.documents import Document
+    from vector_store import get_vector_store
+
+    stored = get_vector_store().get_resume(resume_key)
+    if stored is None:
+        return None
+    payload, vectors = stored
+    documents = [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in payload]
+    return documents, vectors.tolist()
+
+def embed_resume_documents(resume_text, sections=None, tenant=None):
+    """Resume chunks and their vectors, reused from the index store if this resume was seen before.
+
+    The resume is also added to the tenant's corpus index in the background.
+    """
+    from vector_store import get_vector_store, resume_content_key
+
+    store = get_vector_store()
+    key = resume_content_key(resume_text, sections)
+    stored = load_resume_documents(key)
+    if stored is not None:
+        logger.debug("Reusing %d stored resume vectors", len(stored[0]))
+        store.add_to_corpus(key, stored[1], tenant)
+        return stored
+
+    documents = build_resume_documents(resume_text, sections)
+    vectors = embed_documents(documents)
+    store.put_resume(key, [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+                     vectors, tenant)
+    return documents, vectors
+
+def create_embeddings(resume_text, ats_results, persist_directory=None, sections=None,
+                      resume_documents=None, resume_vectors=None):
     try:
-        if not resume_text or not ats_results:
+        if not (resume_text or resume_documents) or not ats_results:
             logger.error("Resume text or ATS results missing")
             raise ValueError("Resume text and ATS results are required")
-        
-        # Initialize the embeddings
-        embeddings = SentenceTransformerEmbeddings('all-MiniLM-L6-v2')
-        
-        # Prepare texts for embedding
-        texts = [resume_text] + [
-            f"{key}: {', '.join(value) if isinstance(value, list) else value}"
-            for key, value in ats_results.items() if key != "ats_compatibility_score"
-        ]
-        documents = [Document(page_content=text, metadata={"source": "resume" if i == 0 else "ats"}) for i, text in enumerate(texts)]
-        
-        # Create FAISS vector store
-        vectorstore = FAISS.from_documents(documents, embeddings)
-        vectorstore.save_local(persist_directory)
-        logger.debug(f"Created FAISS embeddings, stored in {persist_directory}")
+
+        from langchain_community.vectorstores import FAISS
+
+        # Reuse the process-wide embedding model
+        embeddings = _embeddings_class()(EMBEDDING_MODEL_NAME)
+
+        # Index bounded section-level chunks so retrieval returns only the relevant parts
+        if resume_documents is None or resume_vectors is None:
+            resume_documents, resume_vectors = embed_resume_documents(resume_text, sections)
+        ats_documents = build_ats_documents(ats_results)
+        documents = resume_documents + ats_documents
+        vectors = resume_vectors + embed_documents(ats_documents)
+
+        # Create FAISS vector store from the precomputed vectors
+        with span("faiss_build", documents=len(documents)):
+            vectorstore = FAISS.from_embeddings(
+                [(doc.page_content, vector) for doc, vector in zip(documents, vectors)],
+                embeddings,
+                metadatas=[doc.metadata for doc in documents]
+            )
+        if persist_directory:
+            # Snapshot off the request path; resume vectors are already persisted by the index store
+            from vector_store import get_vector_store
+            get_vector_store().submit_write(_save_vectorstore, vectorstore, persist_directory)
+        logger.debug("Created FAISS embeddings for %d chunks", len(documents))
         return vectorstore
     except Exception as e:
         logger.error(f"Embedding error: {str(e)}")
-        raise RuntimeError(f"Failed to create embeddings: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to create embeddings: {str(e)}")
+
+def restore_embeddings(resume_key, ats_results):
+    """Rebuild a FAISS index from the resume vectors kept in the index store, without re-embedding."""
+    stored = load_resume_documents(resume_key)
+    if stored is None:
+        logger.error(f"No stored vectors for resume {resume_key[:12]}")
+        raise RuntimeError("Failed to restore embeddings: resume is no longer in the index store")
+    resume_documents, resume_vectors = stored
+    return create_embeddings(None, ats_results, resume_documents=resume_documents, resume_vectors=resume_vectors)
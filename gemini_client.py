@@ -0,0 +1,203 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import record_span, set_gauge
+from util import setup_logging, configure_gemini
+
+logger = setup_logging(__name__)
+
+# Sized to the API quota; override per deployment
+REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_RPM", 60))
+BURST = int(os.getenv("GEMINI_BURST", 5))
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", 64))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 4))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 16.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class QueueFullError(RuntimeError):
+    pass
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+def _status_code(error):
+    code = getattr(error, "code", None)
+    if callable(code):
+        code = code()
+    if isinstance(code, int):
+        return code
+    return getattr(code, "value", None) if code is not None else None
+
+def is_retryable(error):
+    code = _status_code(error)
+    if code in RETRYABLE_STATUS_CODES:
+        return True
+    # Fall back to the message for transports that don't expose a status code
+    message = str(error)
+    return any(marker in message for marker in ("429", "Resource has been exhausted", "503", "500 Internal"))
+
+def _default_backend(model_name, prompt, generation_config, stream):
+    model = _get_model(model_name)
+    return model.generate_content(prompt, generation_config=generation_config, stream=stream)
+
+_models = {}
+_models_lock = threading.Lock()
+
+def _get_model(model_name):
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = configure_gemini().GenerativeModel(model_name)
+            _models[model_name] = model
+    return model
+
+class GeminiClient:
+    """Shared Gemini access: rate limiting, bounded workers, retries and request coalescing."""
+
+    def __init__(self, backend=None, requests_per_minute=REQUESTS_PER_MINUTE, burst=BURST,
+                 max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE, max_retries=MAX_RETRIES):
+        self.backend = backend or _default_backend
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._queued = 0
+        self._active = 0
+        self.counters = {"requests": 0, "coalesced": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def _publish(self):
+        set_gauge("gemini_queue_depth", self._queued)
+        set_gauge("gemini_active_requests", self._active)
+
+    def _call_with_retries(self, model_name, prompt, generation_config, stream=False):
+        attempt = 0
+        while True:
+            throttled = self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.backend(model_name, prompt, generation_config, stream)
+                record_span("gemini_request", time.perf_counter() - start,
+                            {"attempts": attempt + 1, "throttled_s": throttled})
+                return response
+            except Exception as e:
+                retryable = is_retryable(e) and attempt < self.max_retries
+                record_span("gemini_request", time.perf_counter() - start, {"throttled_s": throttled}, error=True)
+                if not retryable:
+                    with self._lock:
+                        self.counters["failures"] += 1
+                    raise
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                with self._lock:
+                    self.counters["retries"] += 1
+                logger.warning("Gemini request failed (%s), retry %d in %.1fs", e, attempt, delay)
+                time.sleep(delay)
+
+    def _run(self, key, model_name, prompt, generation_config):
+        # Slots are shared with streaming calls so both count toward one concurrency cap
+        with self._slots:
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._publish()
+            try:
+                return self._call_with_retries(model_name, prompt, generation_config)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._in_flight.pop(key, None)
+                    self._publish()
+
+    def submit(self, prompt, model_name, generation_config=None):
+        """Queue a request; identical prompts already in flight share one future."""
+        key = (model_name, prompt, json.dumps(generation_config or {}, sort_keys=True))
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return future
+            if self._queued >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise QueueFullError("Gemini request queue is full, try again shortly")
+            self.counters["requests"] += 1
+            self._queued += 1
+            self._publish()
+            future = self._pool.submit(self._run, key, model_name, prompt, generation_config)
+            self._in_flight[key] = future
+        return future
+
+    def generate(self, prompt, model_name, generation_config=None, timeout=None):
+        """Blocking generate_content through the shared queue."""
+        return self.submit(prompt, model_name, generation_config).result(timeout=timeout)
+
+    def generate_stream(self, prompt, model_name, generation_config=None):
+        """Yield streamed chunks; holds one concurrency slot until the stream is consumed."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise QueueFullError("Gemini request queue is full, try again shortly")
+            self.counters["requests"] += 1
+            self._queued += 1
+            self._publish()
+        with self._slots:
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._publish()
+            try:
+                # Retries only cover opening the stream, never a partially delivered answer
+                response = self._call_with_retries(model_name, prompt, generation_config, stream=True)
+                for chunk in response:
+                    yield chunk
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._publish()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, queue_depth=self._queued, active=self._active,
+                        in_flight=len(self._in_flight))
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_gemini_client():
+    """Process-wide client shared by the analyzer, chatbot and every session."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GeminiClient()
+    return _default_client
@@ -0,0 +1,128 @@
+"""Reverse matching: rank a local corpus of job descriptions against one resume.
+
+Usage:
+    python job_matcher.py build jobs.jsonl --corpus-dir data/jd_corpus
+    python job_matcher.py match resume.pdf --corpus-dir data/jd_corpus --top 10 --review 3
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+DEFAULT_CORPUS_DIR = "./data/jd_corpus"
+EMBEDDINGS_FILE = "jd_embeddings.npy"
+METADATA_FILE = "jd_metadata.jsonl"
+
+def build_jd_corpus(jobs_path, corpus_dir=DEFAULT_CORPUS_DIR, batch_size=128):
+    """Embed a JSONL file of {"title", "description", ...} records into a normalized matrix."""
+    from embedder import encode_texts, normalize_rows
+
+    with open(jobs_path, encoding="utf-8") as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    jobs = [job for job in jobs if job.get("description")]
+    if not jobs:
+        raise ValueError(f"No job descriptions found in {jobs_path}")
+
+    texts = [f"{job.get('title', '')}\n{job['description']}" for job in jobs]
+    matrix = normalize_rows(encode_texts(texts, batch_size=batch_size))
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    np.save(os.path.join(corpus_dir, EMBEDDINGS_FILE), matrix)
+    with open(os.path.join(corpus_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        for job in jobs:
+            f.write(json.dumps(job) + "\n")
+    logger.info("Embedded %d job descriptions into %s", len(jobs), corpus_dir)
+    return len(jobs)
+
+class JobCorpus:
+    """Precomputed JD embeddings (memory-mapped) plus their metadata records."""
+
+    def __init__(self, corpus_dir=DEFAULT_CORPUS_DIR):
+        self.matrix = np.load(os.path.join(corpus_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        with open(os.path.join(corpus_dir, METADATA_FILE), encoding="utf-8") as f:
+            self.jobs = [json.loads(line) for line in f if line.strip()]
+        if len(self.jobs) != len(self.matrix):
+            raise ValueError("JD metadata and embedding matrix are out of sync")
+
+    def __len__(self):
+        return len(self.jobs)
+
+def match_jobs(resume_text, sections, corpus, top_k=10):
+    """Top-k JDs by cosine similarity, scored in one matrix-vector pass, with per-section breakdowns."""
+    from embedder import encode_resume_sections
+
+    # Section centroid represents the whole resume without MiniLM's input truncation
+    names, section_vectors, resume_vector = encode_resume_sections([(resume_text, sections)])[0]
+
+    scores = corpus.matrix @ resume_vector
+    top_k = min(top_k, len(scores))
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    breakdown = section_vectors @ np.asarray(corpus.matrix[top]).T
+    matches = []
+    for column, row in enumerate(top):
+        job = corpus.jobs[row]
+        matches.append({
+            "rank": column + 1,
+            "title": job.get("title"),
+            "job_id": job.get("id", int(row)),
+            "similarity": float(scores[row]),
+            "section_similarity": {name: float(breakdown[i, column]) for i, name in enumerate(names)},
+            "job": job,
+        })
+    return matches
+
+def review_top_matches(resume_text, matches, review_count=3):
+    """Send only the best few matches to Gemini, so API calls don't grow with the corpus."""
+    from ats_analyzer import analyze_resume_with_gemini
+
+    for match in matches[:review_count]:
+        try:
+            match["ats_results"] = analyze_resume_with_gemini(
+                resume_text, match["job"]["description"], match["title"] or "")
+        except Exception as e:
+            logger.error(f"Review failed for {match['title']}: {str(e)}")
+            match["ats_results"] = None
+    return matches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match one resume against a corpus of job descriptions.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Embed a JSONL file of job descriptions")
+    build.add_argument("jobs", help="JSONL with title and description fields")
+    build.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+
+    match = subparsers.add_parser("match", help="Rank the corpus against a resume PDF")
+    match.add_argument("resume", help="Resume PDF")
+    match.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    match.add_argument("--top", type=int, default=10)
+    match.add_argument("--review", type=int, default=0, help="Number of top matches to review with Gemini")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_jd_corpus(args.jobs, args.corpus_dir)
+        return 0
+
+    from pdf_parser import parse_pdf_resume
+
+    resume_text, sections = parse_pdf_resume(args.resume)
+    matches = match_jobs(resume_text, sections, JobCorpus(args.corpus_dir), args.top)
+    if args.review:
+        review_top_matches(resume_text, matches, args.review)
+    for match in matches:
+        line = f"{match['rank']:>3}. {match['similarity']:.3f}  {match['title']}"
+        if match.get("ats_results"):
+            line += f"  (ATS {match['ats_results']['ats_compatibility_score']}%)"
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+for from has have having he her his how i in into is it its job may more most must not of on or our
+out over per role she should so such than that the their them then there these they this those to
+under up us via was we were what when where which while who will with within without work would you
+your years year experience team teams strong ability skills knowledge including etc using use used
+looking seeking candidate responsibilities requirements required preferred plus good excellent
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#.]*(?:-[a-z0-9+#]+)*")
+NUMBER_PATTERN = re.compile(r"\d")
+
+# Weight of each component in the final 0-100 score
+KEYWORD_WEIGHT = 0.5
+SEMANTIC_WEIGHT = 0.4
+STRUCTURE_WEIGHT = 0.1
+EXPECTED_SECTIONS = ("skills", "experience", "education", "contact")
+
+def tokenize(text):
+    tokens = [t.rstrip(".") for t in TOKEN_PATTERN.findall((text or "").lower())]
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+def extract_terms(text):
+    """Unigrams plus adjacent bigrams, so multi-word skills like 'machine learning' match."""
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def _section_texts(resume_text, sections):
+    texts = {}
+    for name, items in (sections or {}).items():
+        if items:
+            texts[name] = " ".join(items)
+    if not texts:
+        texts["resume"] = resume_text
+    return texts
+
+def _keyword_overlap(resume_text, section_texts, job_description):
+    jd_counts = Counter(extract_terms(job_description))
+    if not jd_counts:
+        return 0.0, [], []
+    vocab = list(jd_counts)
+    index = {term: i for i, term in enumerate(vocab)}
+
+    # Term-count matrix: row 0 is the JD, then the full resume, then each section
+    docs = [job_description, resume_text] + list(section_texts.values())
+    counts = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, doc in enumerate(docs):
+        for term in extract_terms(doc):
+            col = index.get(term)
+            if col is not None:
+                counts[row, col] += 1
+
+    # Smoothed IDF over the documents, weighted by how often the JD repeats a term
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+    weights = counts[0] * idf
+    present = counts[1] > 0
+    coverage = float(weights[present].sum() / weights.sum()) if weights.sum() else 0.0
+
+    order = np.argsort(-weights, kind="stable")
+    matched = [vocab[i] for i in order if present[i]]
+    missing = [vocab[i] for i in order if not present[i]]
+    return coverage, matched, missing
+
+def _semantic_similarity(section_texts, job_description):
+    from embedder import encode_texts, normalize_rows
+
+    names = list(section_texts)
+    vectors = normalize_rows(encode_texts([job_description] + [section_texts[n] for n in names]))
+    sims = vectors[1:] @ vectors[0]
+    per_section = {name: float(sim) for name, sim in zip(names, sims)}
+    # Blend the best-matching section with the average so one strong section doesn't dominate
+    overall = 0.5 * float(sims.max()) + 0.5 * float(sims.mean()) if len(sims) else 0.0
+    return max(overall, 0.0), per_section
+
+def _suggestions(sections, missing_keywords, coverage):
+    suggestions = []
+    for name in EXPECTED_SECTIONS:
+        if not (sections or {}).get(name):
+            suggestions.append(f"Add a clearly labelled '{name.title()}' section so ATS parsers can find it.")
+    if missing_keywords:
+        suggestions.append("Work these job description keywords into your resume where accurate: "
+                           + ", ".join(missing_keywords[:8]) + ".")
+    experience = (sections or {}).get("experience", [])
+    if experience and not any(NUMBER_PATTERN.search(entry) for entry in experience):
+        suggestions.append("Quantify achievements in your experience section with numbers or percentages.")
+    if coverage < 0.5:
+        suggestions.append("Mirror the job description's wording for skills and tools you already have.")
+    if not suggestions:
+        suggestions.append("Your resume covers the job description well; tailor the summary to the role.")
+    return suggestions
+
+def score_resume_locally(resume_text, job_description, job_title, sections=None, use_embeddings=True):
+    """Deterministic, offline ATS analysis returning the same shape as the Gemini path."""
+    if not resume_text or not job_description:
+        logger.error("Resume text or job description missing")
+        raise ValueError("Resume text and job description are required")
+
+    start = time.perf_counter()
+    target = f"{job_title}\n{job_description}" if job_title else job_description
+    section_texts = _section_texts(resume_text, sections)
+
+    coverage, matched, missing = _keyword_overlap(resume_text, section_texts, target)
+    semantic, per_section = _semantic_similarity(section_texts, target) if use_embeddings else (coverage, {})
+    structure = sum(1 for name in EXPECTED_SECTIONS if (sections or {}).get(name)) / len(EXPECTED_SECTIONS)
+
+    score = KEYWORD_WEIGHT * coverage + SEMANTIC_WEIGHT * semantic + STRUCTURE_WEIGHT * structure
+    resume_skills = (sections or {}).get("skills") or []
+    missing_unigrams = [term for term in missing if " " not in term]
+
+    result = {
+        "ats_compatibility_score": int(round(min(max(score, 0.0), 1.0) * 100)),
+        "skills": resume_skills[:30] or [term for term in matched if " " not in term][:15],
+        "keywords": matched[:20],
+        "trending_skills": missing_unigrams[:10],
+        "trending_keywords": [term for term in missing if " " in term][:10],
+        "suggestions": _suggestions(sections, missing_unigrams, coverage),
+    }
+    logger.debug("Local ATS score %s computed in %.1f ms (section similarity: %s)",
+                 result["ats_compatibility_score"], (time.perf_counter() - start) * 1000, per_section)
+    return result
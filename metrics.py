@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Process-wide span registry shared by every session
+_lock = threading.Lock()
+_stages = {}
+_recent = deque(maxlen=200)
+_gauges = {}
+
+METRIC_PREFIX = "careersync"
+
+def _new_stage():
+    return {"count": 0, "errors": 0, "total_s": 0.0, "min_s": None, "max_s": 0.0, "totals": {}}
+
+def record_span(name, duration, attributes=None, error=False):
+    """Add one finished span to the registry; numeric attributes are summed per stage."""
+    attributes = attributes or {}
+    with _lock:
+        stage = _stages.setdefault(name, _new_stage())
+        stage["count"] += 1
+        stage["errors"] += int(error)
+        stage["total_s"] += duration
+        stage["min_s"] = duration if stage["min_s"] is None else min(stage["min_s"], duration)
+        stage["max_s"] = max(stage["max_s"], duration)
+        for key, value in attributes.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stage["totals"][key] = stage["totals"].get(key, 0) + value
+        _recent.append({
+            "name": name,
+            "duration_s": duration,
+            "error": error,
+            "attributes": dict(attributes),
+            "timestamp": time.time(),
+        })
+
+def set_gauge(name, value):
+    """Record a point-in-time value such as a queue depth."""
+    with _lock:
+        _gauges[name] = value
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block; the yielded dict can be filled with byte/token counts."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield attributes
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_span(name, time.perf_counter() - start, attributes, error)
+
+def snapshot():
+    with _lock:
+        stages = {}
+        for name, stage in _stages.items():
+            stage = dict(stage, totals=dict(stage["totals"]))
+            stage["avg_s"] = stage["total_s"] / stage["count"] if stage["count"] else 0.0
+            stages[name] = stage
+        return {"stages": stages, "gauges": dict(_gauges), "recent": list(_recent)}
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _gauges.clear()
+        _recent.clear()
+
+def export_json(indent=2):
+    return json.dumps(snapshot(), indent=indent, default=str)
+
+def _metric_name(text):
+    return "".join(c if c.isalnum() else "_" for c in text)
+
+def export_prometheus():
+    """Render stage metrics in the Prometheus text exposition format."""
+    state = snapshot()
+    stages = state["stages"]
+    lines = [
+        f"# TYPE {METRIC_PREFIX}_stage_duration_seconds summary",
+    ]
+    for name, stage in sorted(stages.items()):
+        label = f'stage="{name}"'
+        lines.append(f"{METRIC_PREFIX}_stage_duration_seconds_count{{{label}}} {stage['count']}")
+        lines.append(f"{METRIC_PREFIX}_stage_duration_seconds_sum{{{label}}} {stage['total_s']:.6f}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_stage_duration_seconds_max gauge")
+    for name, stage in sorted(stages.items()):
+        lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_max{{stage="{name}"}} {stage["max_s"]:.6f}')
+    lines.append(f"# TYPE {METRIC_PREFIX}_stage_errors_total counter")
+    for name, stage in sorted(stages.items()):
+        lines.append(f'{METRIC_PREFIX}_stage_errors_total{{stage="{name}"}} {stage["errors"]}')
+    attribute_names = sorted({key for stage in stages.values() for key in stage["totals"]})
+    for key in attribute_names:
+        metric = f"{METRIC_PREFIX}_stage_{_metric_name(key)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for name, stage in sorted(stages.items()):
+            if key in stage["totals"]:
+                lines.append(f'{metric}{{stage="{name}"}} {stage["totals"][key]}')
+    for name, value in sorted(state["gauges"].items()):
+        metric = f"{METRIC_PREFIX}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
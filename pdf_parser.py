@@ -1,81 +1,171 @@
 import fitz  # PyMuPDF
+import io
+import os
 import re
 import logging
+from typing import NamedTuple
+from metrics import span
+from util import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = setup_logging(__name__)
 
-def parse_pdf_resume(pdf_path):
+def open_pdf(source):
+    """Open a PDF from a path, raw bytes, a memoryview or a file-like buffer."""
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    if isinstance(source, (bytes, bytearray)):
+        # Stream mode reads straight from memory, nothing is written to disk
+        return fitz.open(stream=source, filetype="pdf")
+    if isinstance(source, memoryview):
+        # PyMuPDF 1.24 only accepts bytes, bytearray or BytesIO streams, so buffers are copied once
+        return fitz.open(stream=source.tobytes(), filetype="pdf")
+    if hasattr(source, "getvalue"):
+        # Streamlit UploadedFile / BytesIO
+        return fitz.open(stream=source.getvalue(), filetype="pdf")
+    if isinstance(source, io.IOBase) or hasattr(source, "read"):
+        return fitz.open(stream=source.read(), filetype="pdf")
+    raise TypeError(f"Unsupported PDF source type: {type(source).__name__}")
+
+SECTION_NAMES = ("skills", "experience", "education", "contact", "projects", "achievements", "certifications")
+# Lines before the first recognized heading (name, summary, headings we don't classify)
+OTHER_SECTION = "other"
+
+# One precompiled alternation; the named group that matched is the section
+SECTION_CLASSIFIER = re.compile(
+    r"^(?:"
+    r"(?P<skills>skills|technical skills|core competencies|technologies)"
+    r"|(?P<experience>experience|work experience|professional experience)"
+    r"|(?P<education>education|academic background)"
+    r"|(?P<contact>contact|contact information|personal information)"
+    r"|(?P<projects>projects|project experience)"
+    r"|(?P<achievements>achievements|awards|honors)"
+    r"|(?P<certifications>certifications|certificates)"
+    r")\s*$",
+    re.I,
+)
+EXPERIENCE_ENTRY_START = re.compile(r"^\d{4}\s*-\s*\d{4}|Present", re.I)
+SKILL_SEPARATORS = re.compile(r"[,\n•\-]+")
+
+class SectionRecord(NamedTuple):
+    """One resume section with its cleaned items and the pages it spans."""
+    section: str
+    items: tuple
+    first_page: int
+    last_page: int
+
+def iter_resume_events(pdf_source):
+    """Yield parse events page by page, holding only the current page's text in memory.
+
+    Events are ("page", page_number, page_text), ("section", name, page_number)
+    and ("line", section, text, page_number).
+    """
+    doc = open_pdf(pdf_source)
     try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text("text") + "\n"
+        current_section = None
+        for page_number, page in enumerate(doc, start=1):
+            page_text = page.get_text("text")
+            yield ("page", page_number, page_text)
+            for line in page_text.split("\n"):
+                line = line.strip()
+                if not line:
+                    continue
+                match = SECTION_CLASSIFIER.match(line)
+                if match:
+                    current_section = match.lastgroup
+                    yield ("section", current_section, page_number)
+                else:
+                    yield ("line", current_section or OTHER_SECTION, line, page_number)
+    finally:
         doc.close()
+
+class _SectionBuilder:
+    """Folds line events into cleaned section items as they arrive."""
+
+    def __init__(self):
+        self.items = {section: [] for section in SECTION_NAMES + (OTHER_SECTION,)}
+        self.pages = {}
+        self._skill_lines = []
+        self._current_job = []
+
+    def add_line(self, section, line, page_number):
+        first, _ = self.pages.get(section, (page_number, page_number))
+        self.pages[section] = (first, page_number)
+        if section == "skills":
+            self._skill_lines.append(line)
+        elif section == "experience":
+            # Group experience lines by job, starting a new entry at each date range
+            if EXPERIENCE_ENTRY_START.match(line) and self._current_job:
+                self.items["experience"].append(" ".join(self._current_job))
+                self._current_job = []
+            self._current_job.append(line)
+        else:
+            self.items[section].append(line)
+
+    def finish(self):
+        if self._skill_lines:
+            skills = SKILL_SEPARATORS.split(" ".join(self._skill_lines))
+            self.items["skills"] = [skill.strip() for skill in skills if skill.strip()]
+        if self._current_job:
+            self.items["experience"].append(" ".join(self._current_job))
+        for section in self.items:
+            self.items[section] = [item for item in self.items[section] if item]
+        return self.items
+
+    def records(self):
+        items = self.finish()
+        return [SectionRecord(section, tuple(items[section]), *self.pages[section])
+                for section in SECTION_NAMES + (OTHER_SECTION,) if items[section]]
+
+def parse_pdf_records(pdf_source):
+    """Typed section records for consumers that don't need the full text, e.g. batch screening.
+
+    Pages are folded into the records as they are read, so only the current page's text
+    and the cleaned items are ever held, not a second copy of the whole document.
+    """
+    with span("pdf_parse") as trace:
+        if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+            trace["bytes"] = len(pdf_source)
+        builder = _SectionBuilder()
+        pages = chars = 0
+        try:
+            for event in iter_resume_events(pdf_source):
+                if event[0] == "page":
+                    pages += 1
+                    chars += len(event[2])
+                elif event[0] == "line":
+                    builder.add_line(event[1], event[2], event[3])
+        except Exception as e:
+            logger.error(f"PDF parsing error: {str(e)}")
+            raise RuntimeError(f"Failed to parse PDF: {str(e)}")
+        trace["pages"] = pages
+        trace["chars"] = chars
+        return builder.records()
+
+def parse_pdf_resume(pdf_source):
+    with span("pdf_parse") as trace:
+        if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+            trace["bytes"] = len(pdf_source)
+        return _parse_pdf_resume(pdf_source, trace)
+
+def _parse_pdf_resume(pdf_source, trace):
+    try:
+        builder = _SectionBuilder()
+        page_texts = []
+        for event in iter_resume_events(pdf_source):
+            if event[0] == "page":
+                page_texts.append(event[2])
+            elif event[0] == "line":
+                builder.add_line(event[1], event[2], event[3])
+        text = "\n".join(page_texts) + "\n" if page_texts else ""
+        trace["pages"] = len(page_texts)
+        trace["chars"] = len(text)
         
-        logger.debug(f"Parsed text preview: {text[:100]}...")
-
-        sections = {
-            "skills": [],
-            "experience": [],
-            "education": [],
-            "contact": [],
-            "projects": [],
-            "achievements": [],
-            "certifications": []
-        }
-
-        section_patterns = {
-            "skills": r"^(skills|technical skills|core competencies|technologies)\s*$",
-            "experience": r"^(experience|work experience|professional experience)\s*$",
-            "education": r"^(education|academic background)\s*$",
-            "contact": r"^(contact|contact information|personal information)\s*$",
-            "projects": r"^(projects|project experience)\s*$",
-            "achievements": r"^(achievements|awards|honors)\s*$",
-            "certifications": r"^(certifications|certificates)\s*$"
-        }
-
-        lines = text.split("\n")
-        current_section = None
+        logger.debug("Parsed text preview: %s...", text[:100])
+
+        sections = builder.finish()
 
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            for section, pattern in section_patterns.items():
-                if re.match(pattern, line, re.I):
-                    current_section = section
-                    break
-            else:
-                if current_section:
-                    sections[current_section].append(line)
-
-        # Clean up skills section
-        if sections["skills"]:
-            skills_text = " ".join(sections["skills"])
-            skills = re.split(r"[,\n•\-]+", skills_text)
-            sections["skills"] = [s.strip() for s in skills if s.strip()]
-
-        # Format experience section (group by job roles)
-        if sections["experience"]:
-            experience = []
-            current_job = []
-            for line in sections["experience"]:
-                if re.match(r"^\d{4}\s*-\s*\d{4}|Present", line, re.I):
-                    if current_job:
-                        experience.append(" ".join(current_job))
-                        current_job = []
-                current_job.append(line)
-            if current_job:
-                experience.append(" ".join(current_job))
-            sections["experience"] = experience
-
-        # Remove empty entries
-        for section in sections:
-            sections[section] = [item for item in sections[section] if item]
-
-        logger.debug(f"Parsed sections: {sections}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsed sections: %s", sections)
         return text, sections
     except Exception as e:
         logger.error(f"PDF parsing error: {str(e)}")
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_parser import parse_pdf_resume
+from web_scraper import get_job_description
+from ats_analyzer import analyze_resume
+from embedder import create_embeddings, embed_resume_documents, get_embedding_model
+from chatbot import initialize_chatbot
+from vector_store import resume_content_key
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+# Shared executor for every stage. PDF parsing takes a few milliseconds, less than process
+# IPC would cost, and running it here keeps its pdf_parse span in this process's metrics
+_thread_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PIPELINE_THREADS", "8")), thread_name_prefix="pipeline")
+
+class PipelineResult:
+    def __init__(self):
+        self.resume_text = None
+        self.sections = None
+        self.resume_key = None
+        self.job_description = None
+        self.ats_results = None
+        self.vectorstore = None
+        self.chatbot = None
+        self.timings = {}
+        self.wall_time = 0.0
+
+    def critical_path(self):
+        """Sum of the stages on the longest dependency chain, for comparison with wall time."""
+        t = self.timings
+        inputs = max(t.get("parse", 0.0), t.get("scrape", 0.0))
+        resume_vectors = max(t.get("parse", 0.0), t.get("load_model", 0.0)) + t.get("embed_resume", 0.0)
+        analysis = inputs + t.get("analyze", 0.0)
+        return max(analysis, resume_vectors) + t.get("build_index", 0.0) + t.get("chatbot", 0.0)
+
+async def _timed(result, stage, executor, fn, *args):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    finally:
+        result.timings[stage] = time.perf_counter() - start
+        logger.debug("Pipeline stage %s took %.3fs", stage, result.timings[stage])
+
+async def _run(pdf_source, job_title, user_job_description, scoring_mode, tenant):
+    result = PipelineResult()
+    start = time.perf_counter()
+
+    load_model = asyncio.ensure_future(_timed(result, "load_model", _thread_pool, get_embedding_model))
+    parse = asyncio.ensure_future(_timed(result, "parse", _thread_pool, parse_pdf_resume, pdf_source))
+    scrape = asyncio.ensure_future(_timed(result, "scrape", _thread_pool, get_job_description,
+                                          job_title, user_job_description))
+
+    async def parsed():
+        resume_text, sections = await parse
+        if not resume_text:
+            raise ValueError(f"Failed to parse resume: {sections}")
+        return resume_text, sections
+
+    async def embed_resume():
+        resume_text, sections = await parsed()
+        await load_model
+        return await _timed(result, "embed_resume", _thread_pool, embed_resume_documents,
+                            resume_text, sections, tenant)
+
+    async def analyze():
+        resume_text, sections = await parsed()
+        job_description = await scrape
+        return await _timed(result, "analyze", _thread_pool, analyze_resume,
+                            resume_text, job_description, job_title, sections, scoring_mode)
+
+    embed_task = asyncio.ensure_future(embed_resume())
+    analyze_task = asyncio.ensure_future(analyze())
+    tasks = [load_model, parse, scrape, embed_task, analyze_task]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Cancel whatever hasn't finished; work already inside an executor is discarded
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    result.resume_text, result.sections = parse.result()
+    # Lets an evicted session rebuild its index from the store instead of keeping the resume around
+    result.resume_key = resume_content_key(result.resume_text, result.sections)
+    result.job_description = scrape.result()
+    result.ats_results = analyze_task.result()
+    resume_documents, resume_vectors = embed_task.result()
+    result.vectorstore = await _timed(result, "build_index", _thread_pool, lambda: create_embeddings(
+        result.resume_text, result.ats_results, sections=result.sections,
+        resume_documents=resume_documents, resume_vectors=resume_vectors))
+    result.chatbot = await _timed(result, "chatbot", _thread_pool, initialize_chatbot, result.vectorstore, job_title)
+
+    result.wall_time = time.perf_counter() - start
+    logger.info("Analysis pipeline finished in %.2fs (critical path %.2fs, sum of stages %.2fs)",
+                result.wall_time, result.critical_path(), sum(result.timings.values()))
+    return result
+
+def run_analysis_pipeline(pdf_source, job_title, user_job_description="", scoring_mode=None, tenant=None):
+    """Run parse, scrape, model load, analysis and indexing concurrently; returns a PipelineResult.
+
+    The resume joins `tenant`'s corpus index (the default tenant when None).
+    """
+    return asyncio.run(_run(pdf_source, job_title, user_job_description, scoring_mode, tenant))
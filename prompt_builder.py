@@ -0,0 +1,217 @@
+import json
+import os
+import re
+
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+# Rough Gemini tokenization for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+RESUME_TOKEN_BUDGET = int(os.getenv("ATS_RESUME_TOKEN_BUDGET", 1500))
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv("ATS_JD_TOKEN_BUDGET", 700))
+
+# Section order when relevance to the job description ties; "other" holds the summary and unclassified headings
+SECTION_PRIORITY = ["skills", "experience", "other", "projects", "certifications", "education", "achievements",
+                    "contact"]
+# Below this share of the resume's characters, the parsed sections are too sparse to stand in for it
+MIN_SECTION_COVERAGE = 0.6
+
+BOILERPLATE_PATTERNS = re.compile(
+    r"^(page \d+( of \d+)?|\d+\s*/\s*\d+|curriculum vitae|resume|references( available)?( upon request)?"
+    r"|equal opportunity employer.*|apply now|show more|show less|see more|save job|report this job)\W*$",
+    re.I,
+)
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#]+")
+LEADING_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# A score value that wasn't cut off: a closed string, or a number followed by a delimiter
+COMPLETE_SCORE = re.compile(r'"ats_compatibility_score"\s*:\s*(?:"[^"]*"|-?\d[\d.]*[\s,}\]])')
+
+ATS_RESULT_KEYS = ("skills", "keywords", "trending_skills", "trending_keywords", "suggestions")
+
+ATS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "ats_compatibility_score": {"type": "INTEGER"},
+        **{key: {"type": "ARRAY", "items": {"type": "STRING"}} for key in ATS_RESULT_KEYS},
+    },
+    "required": ["ats_compatibility_score", *ATS_RESULT_KEYS],
+}
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def clean_lines(lines):
+    """Collapse whitespace and drop boilerplate and duplicate lines, keeping order."""
+    seen = set()
+    cleaned = []
+    for line in lines:
+        line = " ".join(line.split())
+        if not line or BOILERPLATE_PATTERNS.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        cleaned.append(line)
+    return cleaned
+
+def truncate_to_budget(lines, token_budget):
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+def _terms(text):
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+def _section_coverage(resume_text, sections):
+    resume_chars = len("".join(resume_text.split()))
+    section_chars = sum(len("".join(item.split())) for items in sections.values() for item in items)
+    return section_chars / resume_chars if resume_chars else 1.0
+
+def select_resume_content(resume_text, sections, job_description, token_budget=RESUME_TOKEN_BUDGET):
+    """Most JD-relevant resume sections that fit in token_budget, as prompt-ready text."""
+    if (not sections or not any(sections.values())
+            or _section_coverage(resume_text, sections) < MIN_SECTION_COVERAGE):
+        return "\n".join(truncate_to_budget(clean_lines(resume_text.split("\n")), token_budget))
+
+    jd_terms = _terms(job_description)
+    candidates = []
+    for name, items in sections.items():
+        lines = clean_lines(items)
+        if not lines:
+            continue
+        overlap = len(_terms(" ".join(lines)) & jd_terms)
+        priority = SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+        candidates.append((-overlap, priority, name, lines))
+    candidates.sort()
+
+    blocks, remaining = {}, token_budget
+    for _, _, name, lines in candidates:
+        header_cost = estimate_tokens(name) + 2
+        if remaining <= header_cost:
+            break
+        kept = truncate_to_budget(lines, remaining - header_cost)
+        if kept:
+            blocks[name] = kept
+            remaining -= header_cost + sum(estimate_tokens(line) + 1 for line in kept)
+
+    # Present in the resume's natural order regardless of selection order
+    ordered = [name for name in SECTION_PRIORITY if name in blocks] + [n for n in blocks if n not in SECTION_PRIORITY]
+    return "\n\n".join(f"{name.upper()}:\n" + "\n".join(blocks[name]) for name in ordered)
+
+def build_ats_prompt(resume_text, job_description, job_title, sections=None,
+                     resume_token_budget=RESUME_TOKEN_BUDGET, jd_token_budget=JOB_DESCRIPTION_TOKEN_BUDGET):
+    jd_lines = truncate_to_budget(clean_lines(re.split(r"\n|(?<=[.!?])\s+", job_description)), jd_token_budget)
+    resume_content = select_resume_content(resume_text, sections, " ".join(jd_lines), resume_token_budget)
+    return (
+        f"You are an ATS (Applicant Tracking System) analyzer for a {job_title} role.\n"
+        "Compare the resume with the job description and return JSON with: ats_compatibility_score "
+        "(integer 0-100), skills, keywords, trending_skills, trending_keywords and suggestions "
+        "(each a list of short strings).\n\n"
+        f"Resume:\n{resume_content}\n\n"
+        f"Job Description:\n{' '.join(jd_lines)}\n"
+    )
+
+def _extract_json_block(text):
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.S | re.I)
+    if fenced:
+        text = fenced.group(1).strip()
+    start = text.find("{")
+    return text[start:] if start >= 0 else text
+
+def repair_json(text):
+    """Close strings, arrays and objects left open by a truncated response and drop trailing commas."""
+    stack, in_string, escaped = [], False, False
+    string_is_key = False
+    previous = ""
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                previous = '"'
+            continue
+        if char.isspace():
+            continue
+        if char == '"':
+            in_string = True
+            # Inside an object, a string right after "{" or "," is a key
+            string_is_key = bool(stack) and stack[-1] == "}" and previous in ("{", ",")
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return re.sub(r",\s*([}\]])", r"\1", text[:i + 1])
+        previous = char
+
+    repaired = text.rstrip()
+    if in_string:
+        repaired += '"'
+        if string_is_key:
+            repaired += ": null"
+    elif previous == '"' and string_is_key:
+        repaired += ": null"
+    repaired = re.sub(r",\s*$", "", repaired)
+    repaired = re.sub(r":\s*$", ": null", repaired)
+    repaired += "".join(reversed(stack))
+    return re.sub(r",\s*([}\]])", r"\1", repaired)
+
+def coerce_ats_result(data):
+    """Fill missing list fields and normalize types to the shape the UI expects.
+
+    Raises ValueError when there is no usable score, rather than reporting a made-up 0.
+    """
+    result = {}
+    raw_score = data.get("ats_compatibility_score")
+    if raw_score is None or raw_score == "" or isinstance(raw_score, bool):
+        raise ValueError("ATS response has no ats_compatibility_score")
+    try:
+        score = float(raw_score)
+    except (TypeError, ValueError):
+        # "85%", "85/100", "Score: 85" -> the first number
+        leading = LEADING_NUMBER.search(str(raw_score))
+        if not leading:
+            raise ValueError(f"ATS response has a non-numeric score: {raw_score!r}")
+        score = float(leading.group())
+    result["ats_compatibility_score"] = int(round(min(max(score, 0), 100)))
+    for key in ATS_RESULT_KEYS:
+        value = data.get(key) or []
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(",")]
+        result[key] = [str(item) for item in value if item]
+    return result
+
+def parse_ats_response(text):
+    """Tolerant JSON extraction: fences anywhere, surrounding prose, truncation and trailing commas.
+
+    Returns (result, complete); complete is False when the reply had to be repaired or lacked fields.
+    Raises ValueError when the score itself is missing or was cut off.
+    """
+    block = _extract_json_block(text)
+    complete = True
+    try:
+        data = json.loads(block)
+    except json.JSONDecodeError:
+        # A number truncated mid-way ("8" of "85") still parses, so repaired replies must show it ended
+        if not COMPLETE_SCORE.search(block):
+            raise ValueError("ATS response was cut off before its score was complete")
+        data = json.loads(repair_json(block))
+        complete = False
+        logger.warning("Recovered truncated or malformed ATS JSON response")
+    if not isinstance(data, dict):
+        raise ValueError("ATS response is not a JSON object")
+    if any(data.get(key) in (None, "") for key in ATS_RESPONSE_SCHEMA["required"]):
+        complete = False
+    return coerce_ats_result(data), complete
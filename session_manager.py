@@ -0,0 +1,273 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metrics import set_gauge
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+# Per-session and process-wide budgets for live session state; size hosts from the Admin readout
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("SESSION_MEMORY_BUDGET_MB", 64))
+TOTAL_MEMORY_BUDGET_MB = float(os.getenv("SESSIONS_MEMORY_BUDGET_MB", 1024))
+# Idle sessions lose their index first; sessions idle past the expiry are dropped entirely
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", 900))
+SESSION_EXPIRE_SECONDS = float(os.getenv("SESSION_EXPIRE_SECONDS", 86400))
+MAX_CHAT_HISTORY = int(os.getenv("MAX_CHAT_HISTORY", 50))
+# Python object, dict and docstore-id overhead per indexed chunk
+DOCUMENT_OVERHEAD_BYTES = 512
+
+def estimate_vectorstore_bytes(vectorstore):
+    """Approximate memory of a LangChain FAISS store: float32 vectors plus chunk text."""
+    if vectorstore is None:
+        return 0
+    index = getattr(vectorstore, "index", None)
+    size = index.ntotal * index.d * 4 if index is not None else 0
+    documents = getattr(getattr(vectorstore, "docstore", None), "_dict", {})
+    for document in documents.values():
+        size += len(document.page_content) + DOCUMENT_OVERHEAD_BYTES
+    return size
+
+def process_memory_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class SessionState:
+    """Analysis state for one browser session; the index and chatbot are droppable, the rest is small."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.job_title = None
+        self.resume_key = None
+        self.ats_results = None
+        self.vectorstore = None
+        self.chatbot = None
+        self.chat_history = deque(maxlen=MAX_CHAT_HISTORY)
+        self.history_total = 0
+        self.last_access = time.monotonic()
+        self.evictions = 0
+        self.restores = 0
+
+    @property
+    def resident(self):
+        return self.chatbot is not None
+
+    def index_bytes(self):
+        chatbot_bytes = self.chatbot.estimated_bytes() if self.chatbot is not None else 0
+        return estimate_vectorstore_bytes(self.vectorstore) + chatbot_bytes
+
+    def history_bytes(self):
+        return sum(len(chat["query"]) + len(chat["response"]) for chat in self.chat_history)
+
+    def estimated_bytes(self):
+        return self.index_bytes() + self.history_bytes()
+
+    def drop_index(self):
+        self.vectorstore = None
+        self.chatbot = None
+        self.evictions += 1
+
+class SessionManager:
+    """LRU registry of session state that keeps the resident indexes within a memory budget."""
+
+    def __init__(self, session_budget_mb=SESSION_MEMORY_BUDGET_MB, total_budget_mb=TOTAL_MEMORY_BUDGET_MB,
+                 idle_seconds=SESSION_IDLE_SECONDS, expire_seconds=SESSION_EXPIRE_SECONDS,
+                 restore=None):
+        self.session_budget = session_budget_mb * 1024 * 1024
+        self.total_budget = total_budget_mb * 1024 * 1024
+        self.idle_seconds = idle_seconds
+        self.expire_seconds = expire_seconds
+        self._restore = restore or _default_restore
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"evictions": 0, "restores": 0, "expired": 0, "history_trimmed": 0}
+
+    def _touch(self, session_id):
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = SessionState(session_id)
+            self._sessions[session_id] = state
+        state.last_access = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return state
+
+    def get(self, session_id):
+        with self._lock:
+            return self._touch(session_id)
+
+    def store_analysis(self, session_id, job_title, resume_key, ats_results, vectorstore, chatbot):
+        """Replace a session's analysis; its chat history starts over."""
+        with self._lock:
+            state = self._touch(session_id)
+            state.job_title = job_title
+            state.resume_key = resume_key
+            state.ats_results = ats_results
+            state.vectorstore = vectorstore
+            state.chatbot = chatbot
+            state.chat_history.clear()
+            state.history_total = 0
+            self._enforce_budgets(state)
+        return state
+
+    def clear(self, session_id):
+        with self._lock:
+            state = self._touch(session_id)
+            state.job_title = state.resume_key = state.ats_results = None
+            state.vectorstore = state.chatbot = None
+            state.chat_history.clear()
+            state.history_total = 0
+            self._publish()
+
+    def get_chatbot(self, session_id):
+        """The session's chatbot, rebuilt from the persistent index store if it was evicted."""
+        with self._lock:
+            state = self._touch(session_id)
+            if state.resident or state.resume_key is None:
+                return state.chatbot
+            resume_key, ats_results, job_title = state.resume_key, state.ats_results, state.job_title
+
+        # Restore outside the lock so other sessions aren't blocked on the rebuild
+        start = time.perf_counter()
+        vectorstore, chatbot = self._restore(resume_key, ats_results, job_title)
+        with self._lock:
+            if state.resume_key != resume_key:
+                return state.chatbot
+            if not state.resident:
+                state.vectorstore, state.chatbot = vectorstore, chatbot
+                state.restores += 1
+                self.counters["restores"] += 1
+                logger.info("Restored session %s index in %.2fs", session_id[:8], time.perf_counter() - start)
+                self._enforce_budgets(state)
+            # An index over the session budget isn't kept resident, but still answers this request
+            return state.chatbot or chatbot
+
+    def add_chat(self, session_id, query, response):
+        with self._lock:
+            state = self._touch(session_id)
+            if len(state.chat_history) == state.chat_history.maxlen:
+                self.counters["history_trimmed"] += 1
+            state.chat_history.append({"query": query, "response": response})
+            state.history_total += 1
+            self._enforce_budgets(state)
+
+    def chat_window(self, session_id, size):
+        """The last `size` exchanges with their 1-based question numbers, plus how many are older."""
+        with self._lock:
+            state = self._touch(session_id)
+            history = list(state.chat_history)
+            first_number = state.history_total - len(history) + 1
+        window = history[-size:] if size else []
+        offset = first_number + len(history) - len(window)
+        return [(offset + i, chat) for i, chat in enumerate(window)], len(history) - len(window)
+
+    def _enforce_budgets(self, active):
+        """Trim the active session to its own budget, then evict idle and least-recently-used indexes."""
+        if active.index_bytes() > self.session_budget and active.resume_key is not None:
+            # Trimming chat history can't fix an oversized index; the index is rebuilt from the
+            # store on demand, the conversation couldn't be
+            self._evict(active, "oversized")
+        # Whatever is still over budget is caused by the history itself
+        while active.estimated_bytes() > self.session_budget and len(active.chat_history) > 1:
+            active.chat_history.popleft()
+            self.counters["history_trimmed"] += 1
+        if active.estimated_bytes() > self.session_budget:
+            logger.warning("Session %s uses %.1f MB, above its %.1f MB budget", active.session_id[:8],
+                           active.estimated_bytes() / 1e6, self.session_budget / 1e6)
+
+        self._evict_idle(active)
+
+        # OrderedDict order is least recently used first
+        total = sum(state.estimated_bytes() for state in self._sessions.values())
+        for state in list(self._sessions.values()):
+            if total <= self.total_budget:
+                break
+            if state is active or not state.resident:
+                continue
+            freed = state.index_bytes()
+            self._evict(state, "memory")
+            total -= freed
+        self._publish()
+
+    def _evict(self, state, reason):
+        logger.info("Evicting %s session %s index (%.1f MB)", reason, state.session_id[:8],
+                    state.index_bytes() / 1e6)
+        state.drop_index()
+        self.counters["evictions"] += 1
+
+    def _publish(self):
+        resident = [state for state in self._sessions.values() if state.resident]
+        set_gauge("sessions_total", len(self._sessions))
+        set_gauge("sessions_resident", len(resident))
+        set_gauge("sessions_estimated_bytes", sum(state.estimated_bytes() for state in self._sessions.values()))
+
+    def _evict_idle(self, active=None):
+        now = time.monotonic()
+        for session_id, state in list(self._sessions.items()):
+            if state is active:
+                continue
+            idle = now - state.last_access
+            if idle > self.expire_seconds:
+                del self._sessions[session_id]
+                self.counters["expired"] += 1
+            elif state.resident and idle > self.idle_seconds:
+                self._evict(state, "idle")
+
+    def sweep(self):
+        """Apply idle eviction and expiry without a session request driving it."""
+        with self._lock:
+            self._evict_idle()
+            self._publish()
+
+    def stats(self):
+        """Per-session and process-wide memory readout for the Admin page."""
+        now = time.monotonic()
+        with self._lock:
+            estimated = sum(state.estimated_bytes() for state in self._sessions.values())
+            sessions = [{
+                "session": state.session_id[:8],
+                "resident": state.resident,
+                "index_kb": round(state.index_bytes() / 1024, 1),
+                "history_kb": round(state.history_bytes() / 1024, 1),
+                "chat_turns": len(state.chat_history),
+                "idle_s": round(now - state.last_access, 1),
+                "evictions": state.evictions,
+                "restores": state.restores,
+            } for state in reversed(self._sessions.values())]
+            counters = dict(self.counters)
+        return {
+            "sessions": sessions,
+            "session_count": len(sessions),
+            "resident_count": sum(1 for session in sessions if session["resident"]),
+            "estimated_bytes": estimated,
+            "budget_bytes": self.total_budget,
+            "session_budget_bytes": self.session_budget,
+            "process_rss_bytes": process_memory_bytes(),
+            **counters,
+        }
+
+def _default_restore(resume_key, ats_results, job_title):
+    from embedder import restore_embeddings
+    from chatbot import initialize_chatbot
+
+    vectorstore = restore_embeddings(resume_key, ats_results)
+    return vectorstore, initialize_chatbot(vectorstore, job_title)
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+def get_session_manager():
+    """Process-wide manager shared by every Streamlit session."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = SessionManager()
+    return _default_manager
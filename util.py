@@ -1,16 +1,36 @@
 import logging
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
+import threading
 
-def setup_logging():
-    logging.basicConfig(level=logging.DEBUG)
-    return logging.getLogger(__name__)
+# LOG_LEVEL=DEBUG enables payload dumps; production defaults to INFO
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+_genai = None
+_genai_lock = threading.Lock()
+
+def setup_logging(name=None):
+    logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO))
+    return logging.getLogger(name or __name__)
 
 def configure_gemini():
-    load_dotenv()
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY is missing in environment variables.")
-    genai.configure(api_key=GOOGLE_API_KEY)
-    return genai
\ No newline at end of file
+    """Import and configure google.generativeai once per process, on first use."""
+    global _genai
+    if _genai is not None:
+        return _genai
+    with _genai_lock:
+        if _genai is None:
+            from dotenv import load_dotenv
+            import google.generativeai as genai
+
+            load_dotenv()
+            GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+            if not GOOGLE_API_KEY:
+                raise ValueError("GOOGLE_API_KEY is missing in environment variables.")
+            endpoint = os.getenv("GEMINI_API_ENDPOINT")
+            if endpoint:
+                # Point the client at a local stub server, e.g. for load tests
+                genai.configure(api_key=GOOGLE_API_KEY, transport="rest", client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=GOOGLE_API_KEY)
+            _genai = genai
+    return _genai
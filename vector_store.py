@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import span
+from util import setup_logging
+
+logger = setup_logging(__name__)
+
+DEFAULT_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "./data/vector_store")
+# "flat" (exact), "hnsw" or "ivf" (approximate), or "auto": flat until APPROX_THRESHOLD vectors, then HNSW
+DEFAULT_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+APPROX_THRESHOLD = int(os.getenv("VECTOR_APPROX_THRESHOLD", 50000))
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+# Superseded corpus snapshots are kept this long so replicas mid-load can still read them
+STALE_SNAPSHOT_SECONDS = 300
+DEFAULT_TENANT = "default"
+TENANT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def resume_content_key(resume_text, sections=None):
+    """Hash of the normalized resume content that determines its chunk vectors."""
+    digest = hashlib.sha256(re.sub(r"\s+", " ", resume_text or "").strip().encode("utf-8"))
+    if sections:
+        digest.update(json.dumps(sections, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def _normalized(vectors):
+    vectors = np.array(vectors, dtype=np.float32, copy=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _atomic_write(path, write, mode="w"):
+    # Write to a uniquely named temp file and rename, so readers never see a partial file and
+    # processes sharing the directory never collide; resume files are content-addressed, so
+    # concurrent writers of the same key produce identical files
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        if mode is None:
+            write(tmp_path)
+        else:
+            with open(tmp_path, mode, encoding=None if "b" in mode else "utf-8") as f:
+                write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class _TenantCorpus:
+    """One tenant's corpus index; the lock guards index adds and swaps against concurrent searches."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.members_dir = os.path.join(directory, "members")
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.index = None
+        self.ids = []
+        self.keys = set()
+        self.save_queued = False
+
+class VectorIndexStore:
+    """Per-resume chunk vectors on disk plus one incrementally grown corpus index per tenant.
+
+    Resume vectors are keyed by content hash and loaded memory-mapped, so a resume is
+    only ever embedded once. Disk writes and corpus index updates run on a single
+    background writer thread, which is the only thread that adds to or rebuilds an index.
+
+    Each tenant's corpus is derived from its membership markers (one empty file per
+    resume key), so replicas sharing the directory converge: a snapshot saved by one
+    replica that lacks another replica's resumes is topped up from the markers on the
+    next sync.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, index_type=DEFAULT_INDEX_TYPE):
+        self.root = root
+        self.index_type = index_type
+        self._resume_dir = os.path.join(root, "resumes")
+        self._corpus_dir = os.path.join(root, "corpus")
+        os.makedirs(self._resume_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-store")
+        self._pending = []
+        self._resume_writes = {}
+        self._corpora = {}
+
+    # Per-resume vectors
+
+    def _paths(self, key):
+        base = os.path.join(self._resume_dir, key)
+        return f"{base}.npy", f"{base}.json"
+
+    def has_resume(self, key):
+        return all(os.path.exists(path) for path in self._paths(key))
+
+    def get_resume(self, key):
+        """Return (documents, vectors) for a stored resume, or None."""
+        vectors_path, documents_path = self._paths(key)
+        if not (os.path.exists(vectors_path) and os.path.exists(documents_path)):
+            return None
+        with span("vector_store_load") as trace:
+            with open(documents_path, encoding="utf-8") as f:
+                documents = json.load(f)
+            vectors = np.load(vectors_path, mmap_mode="r")
+            trace["vectors"] = len(vectors)
+        return documents, vectors
+
+    def put_resume(self, key, documents, vectors, tenant=DEFAULT_TENANT):
+        """Persist a resume's chunks and add them to the tenant's corpus index in the background."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not self.has_resume(key):
+            future = self.submit_write(self._write_resume, key, documents, vectors)
+            with self._lock:
+                self._resume_writes[key] = future
+            future.add_done_callback(lambda done: self._forget_write(key, done))
+        self.add_to_corpus(key, vectors, tenant)
+
+    def _forget_write(self, key, future):
+        with self._lock:
+            if self._resume_writes.get(key) is future:
+                del self._resume_writes[key]
+
+    def wait_for_resume(self, key, timeout=None):
+        """Block until this resume's pending write (if any) is on disk; raises only its own error."""
+        with self._lock:
+            future = self._resume_writes.get(key)
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def submit_write(self, fn, *args):
+        """Run a disk write on the background writer thread."""
+        future = self._writer.submit(fn, *args)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()] + [future]
+        return future
+
+    def _write_resume(self, key, documents, vectors):
+        vectors_path, documents_path = self._paths(key)
+        with span("vector_store_save", vectors=len(vectors)):
+            _atomic_write(vectors_path, lambda f: np.save(f, vectors), mode="wb")
+            _atomic_write(documents_path, lambda f: json.dump(documents, f))
+
+    def flush(self):
+        """Block until all background writes have finished; failures are logged, not raised."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Vector store write failed: {str(e)}")
+
+    # Corpus index
+
+    def _corpus(self, tenant):
+        tenant = tenant or DEFAULT_TENANT
+        if not TENANT_PATTERN.match(tenant):
+            raise ValueError(f"Invalid tenant: {tenant!r}")
+        with self._lock:
+            corpus = self._corpora.get(tenant)
+            if corpus is None:
+                corpus = self._corpora[tenant] = _TenantCorpus(os.path.join(self._corpus_dir, tenant))
+        return corpus
+
+    def _new_index(self, dim, count):
+        import faiss
+
+        index_type = self.index_type
+        if index_type == "auto":
+            index_type = "hnsw" if count >= APPROX_THRESHOLD else "flat"
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+        if index_type == "ivf" and count >= 1000:
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, max(1, int(count ** 0.5)), faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = IVF_NPROBE
+            return index
+        # IVF needs enough vectors to train; stay exact until then
+        return faiss.IndexFlatIP(dim)
+
+    def _load_corpus(self, corpus):
+        """Read the tenant's latest snapshot once; call with corpus.lock held."""
+        if corpus.loaded:
+            return
+        import faiss
+
+        corpus.loaded = True
+        try:
+            with open(corpus.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            index = faiss.read_index(os.path.join(corpus.directory, manifest["index"]))
+            ids = [tuple(item) for item in manifest["ids"]]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            # The corpus is derived data; the next sync rebuilds it from the membership markers
+            logger.error(f"Failed to load corpus index from {corpus.directory}: {str(e)}")
+            return
+        if index.ntotal != len(ids):
+            logger.error(f"Corpus index in {corpus.directory} doesn't match its ids; rebuilding")
+            return
+        corpus.index, corpus.ids = index, ids
+        corpus.keys = {key for key, _ in ids}
+
+    def add_to_corpus(self, key, vectors, tenant=DEFAULT_TENANT):
+        """Queue a stored resume's vectors for the tenant's corpus index; a no-op if already indexed."""
+        corpus = self._corpus(tenant)
+        with corpus.lock:
+            if key in corpus.keys:
+                return
+        self.submit_write(self._index_resume, tenant, key, np.asarray(vectors, dtype=np.float32))
+
+    def _index_resume(self, tenant, key, vectors):
+        corpus = self._corpus(tenant)
+        os.makedirs(corpus.members_dir, exist_ok=True)
+        marker = os.path.join(corpus.members_dir, key)
+        if not os.path.exists(marker):
+            _atomic_write(marker, lambda f: None)
+        self._sync_corpus(corpus, {key: vectors})
+
+    def _sync_corpus(self, corpus, known=None):
+        """Add every member resume missing from the in-memory index; runs on the writer thread."""
+        with corpus.lock:
+            self._load_corpus(corpus)
+            indexed = set(corpus.keys)
+        try:
+            members = os.listdir(corpus.members_dir)
+        except FileNotFoundError:
+            members = []
+
+        # Vectors are read and normalized outside the lock so searches aren't blocked on disk
+        batches = []
+        for key in members:
+            if key in indexed or key.endswith(".tmp"):
+                continue
+            vectors = (known or {}).get(key)
+            if vectors is None:
+                stored = self.get_resume(key)
+                if stored is None:
+                    # Another replica's resume write hasn't landed yet; picked up on a later sync
+                    continue
+                vectors = stored[1]
+            if len(vectors):
+                batches.append((key, _normalized(vectors)))
+        if not batches:
+            return
+
+        with corpus.lock:
+            for key, vectors in batches:
+                if corpus.index is None:
+                    corpus.index = self._new_index(vectors.shape[1], len(vectors))
+                if not corpus.index.is_trained:
+                    corpus.index.train(vectors)
+                corpus.index.add(vectors)
+                corpus.ids.extend((key, i) for i in range(len(vectors)))
+                corpus.keys.add(key)
+        self._maybe_rebuild(corpus)
+        self._queue_save(corpus)
+
+    def _maybe_rebuild(self, corpus):
+        # Switch an exact index to an approximate one once the corpus is large enough. Only the
+        # writer thread mutates indexes, so the old one can be read without the lock while
+        # searches keep using it; the lock is held only to swap in the rebuilt index
+        import faiss
+
+        index = corpus.index
+        count = index.ntotal
+        wants_approx = self.index_type in ("auto", "hnsw", "ivf") and count >= APPROX_THRESHOLD
+        if not wants_approx or not isinstance(index, faiss.IndexFlat):
+            return
+        with span("vector_store_rebuild", vectors=count):
+            vectors = index.reconstruct_n(0, count)
+            rebuilt = self._new_index(vectors.shape[1], count)
+            if not rebuilt.is_trained:
+                rebuilt.train(vectors)
+            rebuilt.add(vectors)
+        with corpus.lock:
+            corpus.index = rebuilt
+        logger.info("Rebuilt corpus index as %s with %d vectors", type(rebuilt).__name__, count)
+
+    def _queue_save(self, corpus):
+        # Coalesce saves: one queued save covers every add queued before it runs
+        with corpus.lock:
+            if corpus.save_queued:
+                return
+            corpus.save_queued = True
+        self.submit_write(self._save_corpus, corpus)
+
+    def _save_corpus(self, corpus):
+        import faiss
+
+        with corpus.lock:
+            corpus.save_queued = False
+            index, ids = corpus.index, list(corpus.ids)
+        if index is None:
+            return
+        # Runs on the writer thread, the only one that mutates the index, so no clone is needed.
+        # The snapshot gets a unique name and the manifest is replaced last, so readers never
+        # pair an index with another replica's ids
+        name = f"index.{os.getpid()}.{uuid.uuid4().hex}.faiss"
+        with span("vector_store_save_corpus", vectors=index.ntotal):
+            _atomic_write(os.path.join(corpus.directory, name),
+                          lambda path: faiss.write_index(index, path), mode=None)
+            _atomic_write(corpus.manifest_path, lambda f: json.dump({"index": name, "ids": ids}, f))
+        self._remove_stale_snapshots(corpus, name)
+
+    def _remove_stale_snapshots(self, corpus, current):
+        cutoff = time.time() - STALE_SNAPSHOT_SECONDS
+        for name in os.listdir(corpus.directory):
+            if name == current or not name.startswith("index.") or not name.endswith(".faiss"):
+                continue
+            path = os.path.join(corpus.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                # Another replica may have removed it first
+                pass
+
+    def search(self, vector, k=10, tenant=DEFAULT_TENANT):
+        """Nearest chunks among the tenant's stored resumes as (resume_key, chunk_index, score)."""
+        corpus = self._corpus(tenant)
+        with corpus.lock:
+            first_load = not corpus.loaded
+            self._load_corpus(corpus)
+        if first_load:
+            # Pick up resumes other replicas indexed after this tenant's last snapshot
+            self.submit_write(self._sync_corpus, corpus)
+        with corpus.lock:
+            if corpus.index is None or corpus.index.ntotal == 0:
+                return []
+            scores, rows = corpus.index.search(_normalized([vector]), k)
+            ids = corpus.ids
+        return [(*ids[row], float(score)) for row, score in zip(rows[0], scores[0]) if row >= 0]
+
+    def stats(self):
+        with self._lock:
+            corpora = dict(self._corpora)
+        tenants = {}
+        for tenant, corpus in corpora.items():
+            with corpus.lock:
+                tenants[tenant] = {
+                    "resumes": len(corpus.keys),
+                    "vectors": corpus.index.ntotal if corpus.index is not None else 0,
+                    "index_type": type(corpus.index).__name__ if corpus.index is not None else None,
+                }
+        return {
+            "resumes": sum(1 for name in os.listdir(self._resume_dir) if name.endswith(".npy")),
+            "tenants": tenants,
+        }
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_vector_store():
+    """Process-wide index store shared by every session."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = VectorIndexStore()
+    return _default_store
@@ -1,53 +1,164 @@
 import requests
-from bs4 import BeautifulSoup
-import logging
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from urllib.parse import quote, quote_plus
+import os
+import re
+import threading
+import time
+from metrics import span, record_span
+from util import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = setup_logging(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+REQUEST_TIMEOUT = 10
+# Each scrape uses one worker per source; sized with the connection pool for concurrent sessions and API workers
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", 16))
+# How long a scrape may wait for a free worker before it counts as failed
+SCRAPE_QUEUE_TIMEOUT = 3 * REQUEST_TIMEOUT
+MIN_DESCRIPTION_CHARS = 500
+CACHE_TTL_SECONDS = int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", 6 * 3600))
+CACHE_MAX_ENTRIES = 512
+
+# Base URLs are overridable so the scraper can be pointed at a local fixture server
+LINKEDIN_BASE_URL = os.getenv("LINKEDIN_BASE_URL", "https://www.linkedin.com")
+INDEED_BASE_URL = os.getenv("INDEED_BASE_URL", "https://www.indeed.com")
+
+# Only description-like containers are parsed; everything else is skipped by the strainer
+LINKEDIN_CLASS_PATTERN = re.compile(r"description|job|posting|details", re.I)
+INDEED_CLASS_PATTERN = re.compile(r"description|job|posting", re.I)
+
+def _linkedin_url(job_title):
+    return f"{LINKEDIN_BASE_URL}/jobs/search?keywords={quote(job_title)}"
+
+def _indeed_url(job_title):
+    return f"{INDEED_BASE_URL}/jobs?q={quote_plus(job_title)}"
+
+SOURCES = [
+    ("linkedin", _linkedin_url, LINKEDIN_CLASS_PATTERN),
+    ("indeed", _indeed_url, INDEED_CLASS_PATTERN),
+]
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scraper")
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_session():
+    """Shared requests session with a connection pool, reused across calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(SOURCES), pool_maxsize=SCRAPE_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+    return _session
+
+def _normalize_title(job_title):
+    return " ".join(job_title.lower().split())
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > CACHE_TTL_SECONDS:
+            del _cache[key]
+            return None
+        return value
+
+def _cache_set(key, value):
+    with _cache_lock:
+        _cache[key] = (time.time(), value)
+        if len(_cache) > CACHE_MAX_ENTRIES:
+            oldest = min(_cache, key=lambda k: _cache[k][0])
+            del _cache[oldest]
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def extract_description(html, class_pattern):
+    strainer = SoupStrainer(["div", "section"], class_=class_pattern)
+    soup = BeautifulSoup(html, "html.parser", parse_only=strainer)
+    job_desc = ""
+    for job in soup.find_all(["div", "section"], class_=class_pattern):
+        text = job.get_text(strip=True)
+        if text:
+            job_desc += text + " "
+        if len(job_desc) > MIN_DESCRIPTION_CHARS:
+            break
+    return job_desc.strip()
+
+def _scrape_source(name, url_builder, class_pattern, job_title):
+    url = url_builder(job_title)
+    with span(f"scrape.{name}") as trace:
+        response = get_session().get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        trace["bytes"] = len(response.content)
+        job_desc = extract_description(response.text, class_pattern)
+        trace["chars"] = len(job_desc)
+    logger.debug("Scraped %d chars from %s", len(job_desc), name)
+    return job_desc
+
+def _scrape_started(started, *args):
+    started.set()
+    return _scrape_source(*args)
+
+def scrape_job_description(job_title, timeout=REQUEST_TIMEOUT):
+    """Query all sources concurrently and return the first non-empty description."""
+    started = threading.Event()
+    futures = {_executor.submit(_scrape_started, started, name, url_builder, pattern, job_title): name
+               for name, url_builder, pattern in SOURCES}
+    errors = []
+    try:
+        # The timeout covers the requests themselves, not time spent queued behind other scrapes
+        if not started.wait(SCRAPE_QUEUE_TIMEOUT):
+            errors.append(f"no scraper worker free after {SCRAPE_QUEUE_TIMEOUT}s")
+        else:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    job_desc = future.result()
+                except Exception as e:
+                    errors.append(f"{futures[future]}: {str(e)}")
+                    continue
+                if job_desc:
+                    return job_desc
+    except FuturesTimeoutError:
+        errors.append(f"timed out after {timeout}s")
+    finally:
+        for future in futures:
+            future.cancel()
+    raise ValueError(f"No job descriptions found ({'; '.join(errors) or 'empty results'})")
 
 def get_job_description(job_title, user_job_description):
     if user_job_description:
         logger.debug("Using user-provided job description")
         return user_job_description
-    
+
+    cache_key = _normalize_title(job_title)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached job description")
+        return cached
+
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9"
-        }
-        # Try LinkedIn
-        url = f"https://www.linkedin.com/jobs/search?keywords={job_title.replace(' ', '%20')}"
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        job_desc = ""
-        # Broader selector
-        for job in soup.find_all(['div', 'section'], class_=lambda x: x and any(keyword in x.lower() for keyword in ['description', 'job', 'posting', 'details'])):
-            text = job.get_text(strip=True)
-            if text:
-                job_desc += text + " "
-            if len(job_desc) > 500:
-                break
-        
-        if not job_desc:
-            # Fallback to Indeed
-            url = f"https://www.indeed.com/jobs?q={job_title.replace(' ', '+')}"
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for job in soup.find_all(['div', 'section'], class_=lambda x: x and any(keyword in x.lower() for keyword in ['description', 'job', 'posting'])):
-                text = job.get_text(strip=True)
-                if text:
-                    job_desc += text + " "
-                if len(job_desc) > 500:
-                    break
-        
-        if not job_desc:
-            raise ValueError("No job descriptions found")
-        
-        logger.debug(f"Scraped job description: {job_desc[:100]}...")
-        return job_desc.strip()
+        job_desc = scrape_job_description(job_title)
+        _cache_set(cache_key, job_desc)
+        logger.debug("Scraped job description: %s...", job_desc[:100])
+        return job_desc
     except Exception as e:
         logger.error(f"Scraping error: {str(e)}")
         logger.warning("Using default job description due to scraping failure")
-        return f"Job description for {job_title}: Seeking a professional with relevant skills and experience."
\ No newline at end of file
+        record_span("scrape_fallback", 0.0, error=True)
+        return f"Job description for {job_title}: Seeking a professional with relevant skills and experience."